@@ -0,0 +1,49 @@
+"""add analytics indexes
+
+Revision ID: 0c8502f536aa
+Revises: 
+Create Date: 2026-10-15 09:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c8502f536aa'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transaction_timestamp "
+            "ON transaction (timestamp)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transaction_timestamp_customer "
+            "ON transaction (timestamp DESC, customer_id) INCLUDE (product_id, price, quantity)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transaction_timestamp_product "
+            "ON transaction (timestamp DESC, product_id) INCLUDE (price, quantity)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alert_created_type_sev "
+            "ON alert (created_at DESC, type, severity)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_alert_created_type_sev")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transaction_timestamp_product")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transaction_timestamp_customer")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transaction_timestamp")
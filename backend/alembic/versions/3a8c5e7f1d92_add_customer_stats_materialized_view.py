@@ -0,0 +1,53 @@
+"""add customer stats materialized view
+
+Revision ID: 3a8c5e7f1d92
+Revises: 9d4f6a0b2c17
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8c5e7f1d92'
+down_revision: Union[str, None] = '9d4f6a0b2c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS customer_stats_mv AS
+        SELECT
+            customer_id,
+            sum(price * quantity) AS total_spent,
+            count(*) AS purchase_count,
+            max(timestamp) AS last_purchase_at
+        FROM transaction
+        WHERE status = 'COMPLETED'
+        GROUP BY customer_id
+        """
+    )
+    # A unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_customer_stats_mv_customer_id "
+        "ON customer_stats_mv (customer_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_customer_stats_mv_total_spent "
+        "ON customer_stats_mv (total_spent)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_customer_stats_mv_last_purchase_at "
+        "ON customer_stats_mv (last_purchase_at)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS customer_stats_mv")
@@ -0,0 +1,38 @@
+"""add transaction status timestamp indexes
+
+Revision ID: 7e2b9c4a6f10
+Revises: 3a8c5e7f1d92
+Create Date: 2026-10-15 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b9c4a6f10'
+down_revision: Union[str, None] = '3a8c5e7f1d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tx_status_ts "
+            "ON transaction (status, timestamp DESC) WHERE status = 'COMPLETED'"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tx_customer_status_ts "
+            "ON transaction (customer_id, status, timestamp DESC)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tx_customer_status_ts")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tx_status_ts")
@@ -0,0 +1,46 @@
+"""add daily sales materialized view
+
+Revision ID: 9d4f6a0b2c17
+Revises: 5b7e21c94d3a
+Create Date: 2026-10-15 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f6a0b2c17'
+down_revision: Union[str, None] = '5b7e21c94d3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_daily_sales AS
+        SELECT
+            date_trunc('day', timestamp) AS day,
+            product_id,
+            customer_id,
+            sum(price * quantity) AS revenue,
+            sum(quantity) AS units,
+            count(*) AS txn_count
+        FROM transaction
+        GROUP BY 1, 2, 3
+        """
+    )
+    # A unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_daily_sales_day_product_customer "
+        "ON mv_daily_sales (day, product_id, customer_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_daily_sales")
@@ -0,0 +1,46 @@
+"""add low stock and covering status indexes
+
+Revision ID: a7d3e91b5c28
+Revises: f2c6d8a41e95
+Create Date: 2026-10-15 13:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e91b5c28'
+down_revision: Union[str, None] = 'f2c6d8a41e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_stock_quantity "
+            "ON product (stock_quantity)"
+        )
+        # Rebuild with id and status in the INCLUDE list for index-only suspicious-transaction scans
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transaction_timestamp_customer")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transaction_timestamp_customer "
+            "ON transaction (timestamp DESC, customer_id) "
+            "INCLUDE (id, product_id, price, quantity, status)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transaction_timestamp_customer")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transaction_timestamp_customer "
+            "ON transaction (timestamp DESC, customer_id) "
+            "INCLUDE (product_id, price, quantity)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_product_stock_quantity")
@@ -0,0 +1,28 @@
+"""add customer region
+
+Revision ID: b8e4f2a6d391
+Revises: a7d3e91b5c28
+Create Date: 2026-10-15 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f2a6d391'
+down_revision: Union[str, None] = 'a7d3e91b5c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('customer', sa.Column('region', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('customer', 'region')
@@ -0,0 +1,33 @@
+"""add transaction customer timestamp index
+
+Revision ID: c41d8e2a7b53
+Revises: 7e2b9c4a6f10
+Create Date: 2026-10-15 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e2a7b53'
+down_revision: Union[str, None] = '7e2b9c4a6f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tx_customer_timestamp "
+            "ON transaction (customer_id, timestamp) INCLUDE (price)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tx_customer_timestamp")
@@ -0,0 +1,91 @@
+"""store transaction status and payment method as strings
+
+Revision ID: e5a9f3c27d84
+Revises: c41d8e2a7b53
+Create Date: 2026-10-15 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9f3c27d84'
+down_revision: Union[str, None] = 'c41d8e2a7b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUS_VALUES = ('pending', 'completed', 'failed', 'suspicious', 'flagged', 'refunded')
+PAYMENT_METHOD_VALUES = ('credit_card', 'apple_pay', 'google_pay', 'paypal', 'bank_transfer')
+
+CUSTOMER_STATS_VIEW = """
+    CREATE MATERIALIZED VIEW customer_stats_mv AS
+    SELECT
+        customer_id,
+        sum(price * quantity) AS total_spent,
+        count(*) AS purchase_count,
+        max(timestamp) AS last_purchase_at
+    FROM transaction
+    WHERE status = '{completed}'
+    GROUP BY customer_id
+"""
+
+
+def _in_list(values) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def _drop_status_dependents() -> None:
+    # Both embed a status literal of the old type and block ALTER COLUMN ... TYPE
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS customer_stats_mv")
+    op.execute("DROP INDEX IF EXISTS ix_tx_status_ts")
+
+
+def _create_status_dependents(completed: str) -> None:
+    op.execute(
+        "CREATE INDEX ix_tx_status_ts ON transaction (status, timestamp DESC) "
+        f"WHERE status = '{completed}'"
+    )
+    op.execute(CUSTOMER_STATS_VIEW.format(completed=completed))
+    op.execute("CREATE UNIQUE INDEX ix_customer_stats_mv_customer_id ON customer_stats_mv (customer_id)")
+    op.execute("CREATE INDEX ix_customer_stats_mv_total_spent ON customer_stats_mv (total_spent)")
+    op.execute("CREATE INDEX ix_customer_stats_mv_last_purchase_at ON customer_stats_mv (last_purchase_at)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_status_dependents()
+    op.execute(
+        "ALTER TABLE transaction "
+        "ALTER COLUMN status TYPE VARCHAR(16) USING lower(status::text), "
+        "ALTER COLUMN payment_method TYPE VARCHAR(16) USING lower(payment_method::text)"
+    )
+    op.execute("DROP TYPE IF EXISTS transactionstatus")
+    op.execute("DROP TYPE IF EXISTS paymentmethod")
+    # Schemas built by init_db (create_all) already carry both CHECKs from the model
+    op.execute("ALTER TABLE transaction DROP CONSTRAINT IF EXISTS ck_tx_status")
+    op.execute("ALTER TABLE transaction DROP CONSTRAINT IF EXISTS ck_tx_payment_method")
+    op.create_check_constraint("ck_tx_status", "transaction", f"status IN ({_in_list(STATUS_VALUES)})")
+    op.create_check_constraint(
+        "ck_tx_payment_method", "transaction", f"payment_method IN ({_in_list(PAYMENT_METHOD_VALUES)})"
+    )
+    _create_status_dependents('completed')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_status_dependents()
+    op.drop_constraint("ck_tx_payment_method", "transaction", type_="check")
+    op.drop_constraint("ck_tx_status", "transaction", type_="check")
+    status_names = tuple(value.upper() for value in STATUS_VALUES)
+    payment_method_names = tuple(value.upper() for value in PAYMENT_METHOD_VALUES)
+    op.execute(f"CREATE TYPE transactionstatus AS ENUM ({_in_list(status_names)})")
+    op.execute(f"CREATE TYPE paymentmethod AS ENUM ({_in_list(payment_method_names)})")
+    op.execute(
+        "ALTER TABLE transaction "
+        "ALTER COLUMN status TYPE transactionstatus USING upper(status)::transactionstatus, "
+        "ALTER COLUMN payment_method TYPE paymentmethod USING upper(payment_method)::paymentmethod"
+    )
+    _create_status_dependents('COMPLETED')
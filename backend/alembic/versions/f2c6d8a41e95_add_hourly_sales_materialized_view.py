@@ -0,0 +1,43 @@
+"""add hourly sales materialized view
+
+Revision ID: f2c6d8a41e95
+Revises: e5a9f3c27d84
+Create Date: 2026-10-15 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6d8a41e95'
+down_revision: Union[str, None] = 'e5a9f3c27d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_hourly_sales AS
+        SELECT
+            date_trunc('hour', timestamp) AS hour,
+            sum(price * quantity) AS total_sales,
+            count(*) AS num_transactions
+        FROM transaction
+        GROUP BY 1
+        """
+    )
+    # A unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_hourly_sales_hour "
+        "ON mv_hourly_sales (hour)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_hourly_sales")
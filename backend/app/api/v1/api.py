@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from app.core.responses import ORJSONResponse
 from app.api.v1.endpoints import (
     dashboard,
     transactions,
@@ -8,7 +9,7 @@ from app.api.v1.endpoints import (
     customer
 )
 
-api_router = APIRouter()
+api_router = APIRouter(default_response_class=ORJSONResponse)
 
 api_router.include_router(
     dashboard.router,
@@ -1,18 +1,21 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from pydantic import BaseModel, Field, validator
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Query
+from sqlalchemy import select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ConfigDict, Field
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_session
+from app.utils.dates import DAY, HOUR, utcnow
 from app.models.alert import Alert
 from app.utils.analytics import (
     get_low_stock_products,
     detect_suspicious_transactions
 )
-from app.core.exceptions import ValidationError, BusinessLogicError
+from app.core.cache import cached_result
+from app.core.exceptions import BusinessLogicError
+from app.core.responses import orjson_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -22,26 +25,15 @@ class AlertType:
     SUSPICIOUS_TRANSACTION = "suspicious_transaction"
     SYSTEM = "system"
 
+AlertTypeValue = Literal["low_stock", "suspicious_transaction", "system"]
+AlertSeverity = Literal["info", "warning", "error"]
+
 class AlertCreate(BaseModel):
-    type: str = Field(..., description="Type of alert")
+    type: AlertTypeValue = Field(..., description="Type of alert")
     message: str = Field(..., description="Alert message")
-    severity: str = Field("info", description="Alert severity (info, warning, error)")
+    severity: AlertSeverity = Field("info", description="Alert severity (info, warning, error)")
     alert_metadata: Optional[dict] = Field(default_factory=dict, description="Additional alert data")
 
-    @validator('type')
-    def validate_type(cls, v):
-        valid_types = [AlertType.LOW_STOCK, AlertType.SUSPICIOUS_TRANSACTION, AlertType.SYSTEM]
-        if v not in valid_types:
-            raise ValidationError(f"Invalid alert type. Must be one of: {', '.join(valid_types)}")
-        return v
-
-    @validator('severity')
-    def validate_severity(cls, v):
-        valid_severities = ["info", "warning", "error"]
-        if v not in valid_severities:
-            raise ValidationError(f"Invalid severity. Must be one of: {', '.join(valid_severities)}")
-        return v
-
 class AlertResponse(BaseModel):
     id: int
     type: str
@@ -50,47 +42,69 @@ class AlertResponse(BaseModel):
     alert_metadata: dict
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+def serialize_alert(alert: Alert) -> dict:
+    """Build the AlertResponse payload from an ORM row without pydantic validation."""
+    return {
+        "id": alert.id,
+        "type": alert.type,
+        "message": alert.message,
+        "severity": alert.severity,
+        "alert_metadata": alert.alert_metadata,
+        "created_at": alert.created_at
+    }
 
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, gt=0, le=100),
-    alert_type: Optional[str] = None,
-    severity: Optional[str] = None,
-    hours: Optional[int] = Query(None, ge=1, le=168),
-    db: Session = Depends(get_db)
+    alert_type: Optional[AlertTypeValue] = None,
+    severity: Optional[AlertSeverity] = None,
+    hours: Optional[int] = Query(None, ge=1, le=168)
 ):
     """
     Get alerts with filtering and pagination.
     """
+    db = get_session()
     try:
-        query = db.query(Alert).order_by(desc(Alert.created_at))
+        query = select(Alert)
         
         if alert_type:
-            if alert_type not in [AlertType.LOW_STOCK, AlertType.SUSPICIOUS_TRANSACTION, AlertType.SYSTEM]:
-                raise ValidationError(f"Invalid alert_type: {alert_type}")
-            query = query.filter(Alert.type == alert_type)
+            query = query.where(Alert.type == alert_type)
         
         if severity:
-            if severity not in ["info", "warning", "error"]:
-                raise ValidationError(f"Invalid severity: {severity}")
-            query = query.filter(Alert.severity == severity)
+            query = query.where(Alert.severity == severity)
         
         if hours:
-            cutoff = datetime.utcnow() - timedelta(hours=hours)
-            query = query.filter(Alert.created_at >= cutoff)
+            cutoff = utcnow() - HOUR * hours
+            query = query.where(Alert.created_at >= cutoff)
+        
+        # Page rows and total count in one round-trip via a window count
+        rows = (
+            await db.execute(
+                query.add_columns(func.count().over().label('total_count'))
+                .order_by(desc(Alert.created_at))
+                .offset(skip)
+                .limit(limit)
+            )
+        ).all()
+        alerts = [row.Alert for row in rows]
         
-        total_count = query.count()
-        alerts = query.offset(skip).limit(limit).all()
+        if rows:
+            total_count = rows[0].total_count
+        elif skip:
+            # Past the last page there is no row to carry the window count
+            total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+        else:
+            total_count = 0
         
         logger.info(
             f"Retrieved alerts: count={len(alerts)}, total={total_count}, "
             f"type={alert_type}, severity={severity}, hours={hours}"
         )
         
-        return alerts
+        return orjson_response([serialize_alert(alert) for alert in alerts])
     
     except Exception as e:
         logger.error(f"Error retrieving alerts: {str(e)}")
@@ -98,10 +112,10 @@ async def get_alerts(
 
 @router.post("/", response_model=AlertResponse)
 async def create_alert(
-    alert: AlertCreate,
-    db: Session = Depends(get_db)
+    alert: AlertCreate
 ):
     """Create a new system alert."""
+    db = get_session()
     try:
         db_alert = Alert(
             type=alert.type,
@@ -111,31 +125,42 @@ async def create_alert(
         )
         
         db.add(db_alert)
-        db.commit()
-        db.refresh(db_alert)
+        # id and created_at are populated by the INSERT; no refresh round-trip needed
+        await db.commit()
         
         logger.info(
             f"Alert created: ID={db_alert.id}, Type={alert.type}, "
             f"Severity={alert.severity}"
         )
         
-        return db_alert
+        return orjson_response(serialize_alert(db_alert))
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Failed to create alert: {str(e)}")
         raise
 
+@cached_result(expire=60, namespace="alerts")
+async def _detect_alert_conditions(db: AsyncSession) -> dict:
+    """Run the read-only alert checks; cached so repeated status polls skip the scans."""
+    return {
+        # Get low stock alerts
+        "low_stock": await get_low_stock_products(db, threshold=10),
+        # Get suspicious transactions; the alert reports every one of them
+        "suspicious": await detect_suspicious_transactions(db, DAY, limit=None)
+    }
+
 @router.get("/system-status")
-async def get_system_status(db: Session = Depends(get_db)):
+async def get_system_status():
     """Get current system status and active alerts."""
+    db = get_session()
     try:
-        # Get low stock alerts
-        low_stock = get_low_stock_products(db, threshold=10)
-        
-        # Get suspicious transactions
-        suspicious = detect_suspicious_transactions(db, timedelta(hours=24))
+        # Only detection is cached; alerts are recorded on every call
+        conditions = await _detect_alert_conditions(db)
+        low_stock = conditions["low_stock"]
+        suspicious = conditions["suspicious"]
         
+        now = utcnow()
         alerts = []
         
         # Add low stock alerts
@@ -144,9 +169,9 @@ async def get_system_status(db: Session = Depends(get_db)):
                 type=AlertType.LOW_STOCK,
                 message=f"{len(low_stock)} products are running low on stock",
                 severity="warning",
-                alert_metadata={"products": low_stock}
+                alert_metadata={"products": low_stock},
+                created_at=now
             )
-            db.add(alert)
             alerts.append(alert)
             logger.warning(f"Low stock alert: {len(low_stock)} products below threshold")
         
@@ -156,27 +181,27 @@ async def get_system_status(db: Session = Depends(get_db)):
                 type=AlertType.SUSPICIOUS_TRANSACTION,
                 message=f"{len(suspicious)} suspicious transactions detected in the last 24h",
                 severity="warning",
-                alert_metadata={"transactions": suspicious}
+                alert_metadata={"transactions": suspicious},
+                created_at=now
             )
-            db.add(alert)
             alerts.append(alert)
             logger.warning(f"Suspicious transactions alert: {len(suspicious)} transactions detected")
         
         if alerts:
-            db.commit()
-            for alert in alerts:
-                db.refresh(alert)
+            # Primary keys come back from INSERT ... RETURNING, so no refresh is needed
+            db.add_all(alerts)
+            await db.commit()
         
         status = "healthy" if not alerts else "warning"
         logger.info(f"System status check completed: status={status}, alerts={len(alerts)}")
         
         return {
             "status": status,
-            "active_alerts": alerts,
-            "last_checked": datetime.utcnow().isoformat()
+            "active_alerts": [serialize_alert(alert) for alert in alerts],
+            "last_checked": now
         }
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error checking system status: {str(e)}")
         raise 
\ No newline at end of file
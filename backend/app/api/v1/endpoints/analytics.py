@@ -1,36 +1,32 @@
-from datetime import datetime, timedelta
 from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, distinct
+from fastapi import APIRouter, Query
+from fastapi_cache.decorator import cache
+from sqlalchemy import Integer, cast, select, func, desc, distinct
 from pydantic import BaseModel, Field
+import heapq
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_session
+from app.utils.dates import DAY, start_of_day, utcnow
 from app.models.transaction import Transaction
 from app.models.product import Product
 from app.models.customer import Customer
+from app.models.daily_sales import daily_sales
 from app.utils.analytics import (
     get_sales_by_hour,
     get_customer_metrics,
     get_transaction_metrics
 )
 from app.core.exceptions import ValidationError, BusinessLogicError
+from app.core.responses import orjson_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/")
-async def get_analytics():
-    """
-    Get analytics data
-    """
-    return {"message": "Analytics endpoint"}
-
 @router.get("/sales/trends")
+@cache(expire=300, namespace="analytics")
 async def get_sales_trends(
-    days: int = Query(30, gt=0, le=365),
-    db: Session = Depends(get_db)
+    days: int = Query(30, gt=0, le=365)
 ):
     """
     Get sales trends over time including:
@@ -39,85 +35,78 @@ async def get_sales_trends(
     - Top selling days
     - Average transaction value trends
     """
+    db = get_session()
     try:
-        cutoff = datetime.utcnow() - timedelta(days=days)
+        cutoff = start_of_day(utcnow() - DAY * days)
         
-        # Get daily sales
-        daily_sales = (
-            db.query(
-                func.date_trunc('day', Transaction.timestamp).label('day'),
-                func.sum(Transaction.price * Transaction.quantity).label('total_sales'),
-                func.count().label('num_transactions')
+        # Get daily sales from the pre-aggregated materialized view
+        day = daily_sales.c.day
+        daily_totals = (
+            await db.execute(
+                select(
+                    day,
+                    func.sum(daily_sales.c.revenue).label('total_sales'),
+                    cast(func.sum(daily_sales.c.txn_count), Integer).label('num_transactions')
+                )
+                .where(day >= cutoff)
+                .group_by(day)
+                .order_by(day)
             )
-            .filter(Transaction.timestamp >= cutoff)
-            .group_by(func.date_trunc('day', Transaction.timestamp))
-            .order_by(func.date_trunc('day', Transaction.timestamp))
-            .all()
-        )
+        ).all()
         
-        if not daily_sales:
+        if not daily_totals:
             logger.info(f"No sales data found for the last {days} days")
-            return {
+            return orjson_response({
                 'daily_sales': [],
                 'weekly_growth': [],
                 'top_selling_days': []
-            }
+            })
         
         # Calculate weekly growth rates
         weekly_sales = []
         prev_week_sales = 0
         
-        for i in range(0, len(daily_sales), 7):
-            week_sales = sum(day.total_sales for day in daily_sales[i:i+7])
+        for i in range(0, len(daily_totals), 7):
+            week_sales = sum(day.total_sales for day in daily_totals[i:i+7])
             growth_rate = ((week_sales - prev_week_sales) / prev_week_sales * 100) if prev_week_sales > 0 else 0
             weekly_sales.append({
-                'week_start': daily_sales[i].day.isoformat(),
+                'week_start': daily_totals[i].day,
                 'total_sales': week_sales,
                 'growth_rate': growth_rate
             })
             prev_week_sales = week_sales
         
-        # Get top selling days
-        top_days = (
-            db.query(
-                func.date_trunc('day', Transaction.timestamp).label('day'),
-                func.sum(Transaction.price * Transaction.quantity).label('total_sales')
-            )
-            .filter(Transaction.timestamp >= cutoff)
-            .group_by(func.date_trunc('day', Transaction.timestamp))
-            .order_by(desc('total_sales'))
-            .limit(5)
-            .all()
-        )
+        # Get top selling days from the same daily aggregates
+        top_days = heapq.nlargest(5, daily_totals, key=lambda d: d.total_sales)
         
         result = {
             'daily_sales': [
                 {
-                    'date': day.day.isoformat(),
+                    'date': day.day,
                     'total_sales': float(day.total_sales),
                     'num_transactions': day.num_transactions
                 }
-                for day in daily_sales
+                for day in daily_totals
             ],
             'weekly_growth': weekly_sales,
             'top_selling_days': [
                 {
-                    'date': day.day.isoformat(),
+                    'date': day.day,
                     'total_sales': float(day.total_sales)
                 }
                 for day in top_days
             ]
         }
         
-        total_sales = sum(day.total_sales for day in daily_sales)
-        total_transactions = sum(day.num_transactions for day in daily_sales)
+        total_sales = sum(day.total_sales for day in daily_totals)
+        total_transactions = sum(day.num_transactions for day in daily_totals)
         logger.info(
             f"Retrieved sales trends: days={days}, "
             f"total_sales=${total_sales:.2f}, "
             f"total_transactions={total_transactions}"
         )
         
-        return result
+        return orjson_response(result)
     
     except Exception as e:
         logger.error(f"Error retrieving sales trends: {str(e)}")
@@ -125,8 +114,7 @@ async def get_sales_trends(
 
 @router.get("/customer/behavior")
 async def get_customer_behavior(
-    days: int = Query(30, gt=0, le=365),
-    db: Session = Depends(get_db)
+    days: int = Query(30, gt=0, le=365)
 ):
     """
     Analyze customer behavior including:
@@ -135,20 +123,22 @@ async def get_customer_behavior(
     - Customer segments
     - Retention metrics
     """
+    db = get_session()
     try:
-        cutoff = datetime.utcnow() - timedelta(days=days)
+        cutoff = utcnow() - DAY * days
         
         # Get purchase frequency distribution
         purchase_freq = (
-            db.query(
-                Transaction.customer_id,
-                func.count().label('num_purchases'),
-                func.avg(Transaction.price * Transaction.quantity).label('avg_purchase_value')
+            await db.execute(
+                select(
+                    Transaction.customer_id,
+                    func.count().label('num_purchases'),
+                    func.avg(Transaction.price * Transaction.quantity).label('avg_purchase_value')
+                )
+                .where(Transaction.timestamp >= cutoff)
+                .group_by(Transaction.customer_id)
             )
-            .filter(Transaction.timestamp >= cutoff)
-            .group_by(Transaction.customer_id)
-            .all()
-        )
+        ).all()
         
         if not purchase_freq:
             logger.info(f"No customer behavior data found for the last {days} days")
@@ -173,27 +163,47 @@ async def get_customer_behavior(
                 }
             }
         
-        # Calculate customer segments based on purchase value
-        segments = {
-            'high_value': len([p for p in purchase_freq if p.avg_purchase_value > 1000]),
-            'medium_value': len([p for p in purchase_freq if 500 <= p.avg_purchase_value <= 1000]),
-            'low_value': len([p for p in purchase_freq if p.avg_purchase_value < 500])
-        }
+        # Bucket customers by value and purchase frequency in a single pass
+        high_value = medium_value = low_value = 0
+        single_purchase = two_to_five = six_plus = 0
+        total_purchases = 0
+        for p in purchase_freq:
+            num_purchases = p.num_purchases
+            avg_value = p.avg_purchase_value
+            total_purchases += num_purchases
+            
+            if avg_value > 1000:
+                high_value += 1
+            elif avg_value >= 500:
+                medium_value += 1
+            else:
+                low_value += 1
+            
+            if num_purchases == 1:
+                single_purchase += 1
+            elif num_purchases <= 5:
+                two_to_five += 1
+            else:
+                six_plus += 1
         
         # Calculate retention
-        retained = len([p for p in purchase_freq if p.num_purchases > 1])
+        retained = two_to_five + six_plus
         total_customers = len(purchase_freq)
         
         result = {
             'purchase_frequency': {
-                'average_purchases': sum(p.num_purchases for p in purchase_freq) / total_customers if total_customers > 0 else 0,
+                'average_purchases': total_purchases / total_customers if total_customers > 0 else 0,
                 'frequency_distribution': {
-                    'single_purchase': len([p for p in purchase_freq if p.num_purchases == 1]),
-                    '2-5_purchases': len([p for p in purchase_freq if 2 <= p.num_purchases <= 5]),
-                    '6+_purchases': len([p for p in purchase_freq if p.num_purchases > 5])
+                    'single_purchase': single_purchase,
+                    '2-5_purchases': two_to_five,
+                    '6+_purchases': six_plus
                 }
             },
-            'customer_segments': segments,
+            'customer_segments': {
+                'high_value': high_value,
+                'medium_value': medium_value,
+                'low_value': low_value
+            },
             'retention_metrics': {
                 'retention_rate': (retained / total_customers * 100) if total_customers > 0 else 0,
                 'total_customers': total_customers,
@@ -214,10 +224,10 @@ async def get_customer_behavior(
         raise
 
 @router.get("/product/performance")
+@cache(expire=300, namespace="analytics")
 async def get_product_performance(
     days: int = Query(30, gt=0, le=365),
-    category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    category: Optional[str] = None
 ):
     """
     Analyze product performance including:
@@ -226,59 +236,64 @@ async def get_product_performance(
     - Stock turnover
     - Revenue contribution
     """
+    db = get_session()
     try:
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        
-        # Base query for product performance
-        query = (
-            db.query(
-                Product.id,
-                Product.name,
-                Product.category,
-                func.sum(Transaction.quantity).label('units_sold'),
-                func.sum(Transaction.price * Transaction.quantity).label('revenue'),
-                Product.stock_quantity
-            )
-            .join(Transaction, Product.id == Transaction.product_id)
-            .filter(Transaction.timestamp >= cutoff)
-            .group_by(Product.id, Product.name, Product.category, Product.stock_quantity)
-        )
+        cutoff = start_of_day(utcnow() - DAY * days)
         
+        filters = [daily_sales.c.day >= cutoff]
         if category:
             # Validate category exists
-            if not db.query(Product.category).filter(Product.category == category).first():
+            if await db.scalar(select(Product.category).where(Product.category == category).limit(1)) is None:
                 raise ValidationError(f"Invalid category: {category}")
-            query = query.filter(Product.category == category)
+            filters.append(Product.category == category)
         
-        products = query.all()
+        # Aggregate over the per-day materialized view instead of raw transactions
+        revenue = func.sum(daily_sales.c.revenue)
+        units_sold = cast(func.sum(daily_sales.c.units), Integer)
         
-        if not products:
+        # Category totals are aggregated in SQL, so only one row per category comes back
+        categories = (
+            await db.execute(
+                select(
+                    Product.category,
+                    revenue.label('total_revenue'),
+                    units_sold.label('units_sold'),
+                    func.count(distinct(Product.id)).label('num_products')
+                )
+                .join(daily_sales, Product.id == daily_sales.c.product_id)
+                .where(*filters)
+                .group_by(Product.category)
+            )
+        ).all()
+        
+        if not categories:
             logger.info(
                 f"No product performance data found for the last {days} days"
                 + (f" in category '{category}'" if category else "")
             )
-            return {
+            return orjson_response({
                 'top_products': [],
                 'category_performance': {}
-            }
-        
-        # Calculate category performance
-        category_performance = {}
-        for product in products:
-            if product.category not in category_performance:
-                category_performance[product.category] = {
-                    'total_revenue': 0,
-                    'units_sold': 0,
-                    'num_products': 0
-                }
-            cat = category_performance[product.category]
-            cat['total_revenue'] += product.revenue
-            cat['units_sold'] += product.units_sold
-            cat['num_products'] += 1
+            })
         
-        # Calculate stock turnover
-        for cat in category_performance.values():
-            cat['avg_turnover'] = cat['units_sold'] / cat['num_products'] if cat['num_products'] > 0 else 0
+        # Top sellers are ranked and limited by the database
+        top_products = (
+            await db.execute(
+                select(
+                    Product.id,
+                    Product.name,
+                    Product.category,
+                    units_sold.label('units_sold'),
+                    revenue.label('revenue'),
+                    Product.stock_quantity
+                )
+                .join(daily_sales, Product.id == daily_sales.c.product_id)
+                .where(*filters)
+                .group_by(Product.id, Product.name, Product.category, Product.stock_quantity)
+                .order_by(desc('revenue'), Product.id)
+                .limit(10)
+            )
+        ).all()
         
         result = {
             'top_products': [
@@ -290,20 +305,20 @@ async def get_product_performance(
                     'revenue': float(p.revenue),
                     'stock_quantity': p.stock_quantity
                 }
-                for p in sorted(products, key=lambda x: x.revenue, reverse=True)[:10]
+                for p in top_products
             ],
             'category_performance': {
-                cat: {
-                    'total_revenue': float(metrics['total_revenue']),
-                    'units_sold': metrics['units_sold'],
-                    'avg_turnover': float(metrics['avg_turnover'])
+                c.category: {
+                    'total_revenue': float(c.total_revenue),
+                    'units_sold': c.units_sold,
+                    'avg_turnover': c.units_sold / c.num_products if c.num_products > 0 else 0.0
                 }
-                for cat, metrics in category_performance.items()
+                for c in categories
             }
         }
         
-        total_revenue = sum(p.revenue for p in products)
-        total_units = sum(p.units_sold for p in products)
+        total_revenue = sum(c.total_revenue for c in categories)
+        total_units = sum(c.units_sold for c in categories)
         logger.info(
             f"Retrieved product performance: days={days}, "
             f"total_revenue=${total_revenue:.2f}, "
@@ -311,16 +326,16 @@ async def get_product_performance(
             + (f", category={category}" if category else "")
         )
         
-        return result
+        return orjson_response(result)
     
     except Exception as e:
         logger.error(f"Error analyzing product performance: {str(e)}")
         raise
 
 @router.get("/geographic")
+@cache(expire=300, namespace="analytics")
 async def get_geographic_analytics(
-    days: int = Query(30, gt=0, le=365),
-    db: Session = Depends(get_db)
+    days: int = Query(30, gt=0, le=365)
 ):
     """
     Get geographic distribution of sales:
@@ -328,51 +343,60 @@ async def get_geographic_analytics(
     - Regional customer concentration
     - Regional product preferences
     """
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    db = get_session()
+    cutoff = utcnow() - DAY * days
+    
+    # Customers without a recorded region are reported together
+    region = func.coalesce(Customer.region, 'Unknown').label('region')
     
     # Get sales by region
     regional_sales = (
-        db.query(
-            Customer.region,
-            func.sum(Transaction.price * Transaction.quantity).label('total_sales'),
-            func.count(distinct(Transaction.customer_id)).label('num_customers'),
-            func.count(distinct(Transaction.product_id)).label('num_products')
+        await db.execute(
+            select(
+                region,
+                func.sum(Transaction.price * Transaction.quantity).label('total_sales'),
+                func.count(distinct(Transaction.customer_id)).label('num_customers'),
+                func.count(distinct(Transaction.product_id)).label('num_products')
+            )
+            .join(Transaction, Customer.id == Transaction.customer_id)
+            .where(Transaction.timestamp >= cutoff)
+            .group_by(region)
+        )
+    ).all()
+    
+    # Get top 5 products for every region in a single windowed query
+    ranked_products = (
+        select(
+            region,
+            Product.name,
+            Product.category,
+            func.sum(Transaction.quantity).label('units_sold'),
+            func.row_number().over(
+                partition_by=region,
+                order_by=desc(func.sum(Transaction.quantity))
+            ).label('rn')
         )
         .join(Transaction, Customer.id == Transaction.customer_id)
-        .filter(Transaction.timestamp >= cutoff)
-        .group_by(Customer.region)
-        .all()
+        .join(Product, Product.id == Transaction.product_id)
+        .where(Transaction.timestamp >= cutoff)
+        .group_by(region, Product.name, Product.category)
+        .subquery()
     )
-    
-    # Get top products by region
-    regional_preferences = {}
-    for region in [r.region for r in regional_sales]:
-        top_products = (
-            db.query(
-                Product.name,
-                Product.category,
-                func.sum(Transaction.quantity).label('units_sold')
-            )
-            .join(Transaction, Product.id == Transaction.product_id)
-            .join(Customer, Transaction.customer_id == Customer.id)
-            .filter(
-                Customer.region == region,
-                Transaction.timestamp >= cutoff
-            )
-            .group_by(Product.name, Product.category)
-            .order_by(desc('units_sold'))
-            .limit(5)
-            .all()
+    top_products = (
+        await db.execute(
+            select(ranked_products)
+            .where(ranked_products.c.rn <= 5)
+            .order_by(ranked_products.c.region, ranked_products.c.rn)
         )
-        
-        regional_preferences[region] = [
-            {
-                'product_name': p.name,
-                'category': p.category,
-                'units_sold': p.units_sold
-            }
-            for p in top_products
-        ]
+    ).all()
+
+    regional_preferences = {r.region: [] for r in regional_sales}
+    for p in top_products:
+        regional_preferences.setdefault(p.region, []).append({
+            'product_name': p.name,
+            'category': p.category,
+            'units_sold': p.units_sold
+        })
     
     return {
         'regional_sales': [
@@ -388,9 +412,9 @@ async def get_geographic_analytics(
     }
 
 @router.get("/hourly-sales")
+@cache(expire=300, namespace="analytics")
 async def get_hourly_sales(
     hours: int = Query(24, gt=0, le=168),  # Default 24 hours, max 1 week
-    db: Session = Depends(get_db)
 ) -> List[Dict]:
     """
     Get hourly sales data for the specified time period.
@@ -399,8 +423,9 @@ async def get_hourly_sales(
     - Total sales amount
     - Number of transactions
     """
+    db = get_session()
     try:
-        sales_data = get_sales_by_hour(db, hours)
+        sales_data = await get_sales_by_hour(db, hours)
         
         if sales_data:
             total_sales = sum(hour['total_sales'] for hour in sales_data)
@@ -413,7 +438,7 @@ async def get_hourly_sales(
         else:
             logger.info(f"No sales data found for the last {hours} hours")
         
-        return sales_data
+        return orjson_response(sales_data)
     
     except Exception as e:
         logger.error(f"Error retrieving hourly sales: {str(e)}")
@@ -1,56 +1,111 @@
-from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, distinct
+from fastapi import APIRouter, Query, HTTPException
+from fastapi_cache.decorator import cache
+from sqlalchemy import select, func, lambda_stmt, or_
+from sqlalchemy.orm import aliased, raiseload
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_session
+from app.utils.dates import DAY, utcnow
 from app.models.customer import Customer
 from app.models.transaction import Transaction, TransactionStatus
+from app.models.customer_stats import customer_stats
 from app.core.exceptions import ResourceNotFound
+from app.core.responses import orjson_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Escape LIKE wildcards in user input so searches stay literal substring matches
+_LIKE_ESCAPE = str.maketrans({"\\": "\\\\", "%": "\\%", "_": "\\_"})
+
 @router.get("/", response_model=Dict[str, Any])
 async def get_customers(
     search: Optional[str] = Query(None, min_length=1),
     page: int = Query(1, gt=0),
     page_size: int = Query(50, gt=0, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[int] = Query(None, ge=0, description="Return customers after this id (keyset pagination)"),
+    include_total: bool = Query(False, description="Also count matches when paginating by cursor")
 ):
-    """Get paginated list of customers with optional search."""
+    """
+    Get paginated list of customers with optional search.
+
+    Pass `cursor` (the previous response's `next_cursor`) to page by id seek
+    instead of OFFSET; the total is then only counted when `include_total` is set.
+    """
+    db = get_session()
     try:
-        # Base query
-        query = db.query(Customer)
+        filters = []
         
-        # Apply search filter if provided
+        # Apply search filter if provided (served by the email trigram index)
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
+            search_term = f"%{search.translate(_LIKE_ESCAPE)}%"
+            filters.append(
                 or_(
-                    Customer.email.ilike(search_term),
+                    Customer.email.ilike(search_term, escape="\\"),
                     # Add more search fields if needed
                 )
             )
         
-        # Get total count first
-        total_count = query.count()
+        # Base query; select only the serialized columns instead of full Customer entities
+        query = select(
+            Customer.id,
+            Customer.email,
+            Customer.registration_date,
+            Customer.total_spent,
+            Customer.risk_score
+        ).where(*filters)
+        # Plain COUNT over the same filters, without wrapping the page query in a subquery
+        count_query = select(func.count(Customer.id)).where(*filters)
         
-        # Calculate pagination
-        total_pages = (total_count + page_size - 1) // page_size
-        offset = (page - 1) * page_size
-        
-        # Get paginated customers
-        customers = query.order_by(Customer.id.asc()).offset(offset).limit(page_size).all()
+        if cursor is not None:
+            # Keyset pagination: seek past the cursor on the primary key, fetching one
+            # extra row to learn whether another page follows
+            customers = (
+                await db.execute(
+                    query.where(Customer.id > cursor)
+                    .order_by(Customer.id.asc())
+                    .limit(page_size + 1)
+                )
+            ).all()
+            has_more = len(customers) > page_size
+            customers = customers[:page_size]
+            total_count = (
+                await db.scalar(count_query) if include_total else None
+            )
+            page = None
+            total_pages = None
+        else:
+            # Calculate pagination
+            offset = (page - 1) * page_size
+            
+            # Get paginated customers and the total count in one round-trip
+            rows = (
+                await db.execute(
+                    query.add_columns(func.count().over().label('total_count'))
+                    .order_by(Customer.id.asc())
+                    .offset(offset)
+                    .limit(page_size)
+                )
+            ).all()
+            customers = rows
+            
+            if rows:
+                total_count = rows[0].total_count
+            elif offset:
+                # Past the last page there is no row to carry the window count
+                total_count = await db.scalar(count_query)
+            else:
+                total_count = 0
+            total_pages = (total_count + page_size - 1) // page_size
+            has_more = page < total_pages
         
         result = {
             "items": [
                 {
                     "id": customer.id,
                     "email": customer.email,
-                    "registration_date": customer.registration_date.isoformat(),
+                    "registration_date": customer.registration_date,
                     "total_spent": float(customer.total_spent),
                     "risk_score": float(customer.risk_score)
                 }
@@ -59,84 +114,71 @@ async def get_customers(
             "total": total_count,
             "page": page,
             "pages": total_pages,
-            "has_more": page < total_pages
+            "has_more": has_more,
+            "next_cursor": customers[-1].id if has_more and customers else None
         }
         
-        logger.info(f"Retrieved {len(customers)} customers, page {page}/{total_pages}, search: {search}")
-        return result
+        logger.info(
+            f"Retrieved {len(customers)} customers, "
+            + (f"cursor {cursor}" if cursor is not None else f"page {page}/{total_pages}")
+            + f", search: {search}"
+        )
+        return orjson_response(result)
     except Exception as e:
         logger.error(f"Error retrieving customers: {str(e)}")
         raise
 
 @router.get("/behavior")
-async def get_customer_behavior(db: Session = Depends(get_db)):
+@cache(expire=300, namespace="customers")
+async def get_customer_behavior():
     """Get customer behavior analytics including segments and purchase patterns."""
+    db = get_session()
     try:
-        # Get total customers using the same method as customer list
-        total_customers = db.query(Customer).count()
-        
-        # Get customers with completed transactions for other metrics
-        customers_with_transactions = (
-            db.query(Customer.id, func.sum(Transaction.price * Transaction.quantity).label('total_spent'))
-            .join(Transaction)
-            .filter(Transaction.status == TransactionStatus.COMPLETED)
-            .group_by(Customer.id)
-            .all()
-        )
+        thirty_days_ago = utcnow() - DAY * 30
         
-        # Purchase frequency distribution (only completed transactions)
-        customer_purchases = (
-            db.query(
-                Customer.id,
-                func.count(Transaction.id).label('purchase_count')
+        # Per-customer purchase count, spend and last purchase come precomputed
+        # from customer_stats_mv (completed transactions only)
+        stats = (
+            await db.execute(
+                select(
+                    select(func.count(Customer.id)).scalar_subquery().label('total_customers'),
+                    func.count().label('customers_with_purchases'),
+                    func.coalesce(func.sum(customer_stats.c.purchase_count), 0).label('total_purchases'),
+                    func.count().filter(customer_stats.c.purchase_count == 1).label('single_purchase'),
+                    func.count().filter(customer_stats.c.purchase_count.between(2, 5)).label('two_to_five'),
+                    func.count().filter(customer_stats.c.purchase_count >= 6).label('six_plus'),
+                    func.count().filter(customer_stats.c.total_spent > 1000).label('high_value'),
+                    func.count().filter(customer_stats.c.total_spent.between(500, 1000)).label('medium_value'),
+                    func.count().filter(customer_stats.c.total_spent < 500).label('low_value'),
+                    func.count().filter(customer_stats.c.last_purchase_at >= thirty_days_ago).label('active_customers')
+                )
+                .select_from(customer_stats)
             )
-            .join(Transaction)
-            .filter(Transaction.status == TransactionStatus.COMPLETED)
-            .group_by(Customer.id)
-            .all()
-        )
-        
-        # Purchase frequency distribution
-        single_purchase = sum(1 for c in customer_purchases if c.purchase_count == 1)
-        two_to_five = sum(1 for c in customer_purchases if 2 <= c.purchase_count <= 5)
-        six_plus = sum(1 for c in customer_purchases if c.purchase_count >= 6)
+        ).one()
         
         # Calculate average purchases (based on customers with transactions)
-        total_purchases = sum(c.purchase_count for c in customer_purchases)
-        customers_with_purchases = len(customer_purchases)
+        total_customers = stats.total_customers or 0
+        customers_with_purchases = stats.customers_with_purchases
+        total_purchases = int(stats.total_purchases)
         avg_purchases = round(total_purchases / customers_with_purchases if customers_with_purchases > 0 else 0, 2)
         
-        # Calculate customer segments based on total_spent
-        high_value = sum(1 for c in customers_with_transactions if c.total_spent > 1000)
-        medium_value = sum(1 for c in customers_with_transactions if 500 <= c.total_spent <= 1000)
-        low_value = sum(1 for c in customers_with_transactions if c.total_spent < 500)
-        
-        # Calculate retention metrics (only completed transactions)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        active_customers = (
-            db.query(func.count(distinct(Customer.id)))
-            .join(Transaction)
-            .filter(
-                Transaction.status == TransactionStatus.COMPLETED,
-                Transaction.timestamp >= thirty_days_ago
-            )
-            .scalar() or 0
-        )
+        # Retention: customers with a completed purchase in the last 30 days
+        active_customers = stats.active_customers
         retention_rate = round((active_customers / total_customers * 100) if total_customers > 0 else 0, 1)
         
         result = {
             "purchase_frequency": {
                 "average_purchases": avg_purchases,
                 "frequency_distribution": {
-                    "single_purchase": single_purchase,
-                    "2-5_purchases": two_to_five,
-                    "6+_purchases": six_plus
+                    "single_purchase": stats.single_purchase,
+                    "2-5_purchases": stats.two_to_five,
+                    "6+_purchases": stats.six_plus
                 }
             },
             "customer_segments": {
-                "high_value": high_value,
-                "medium_value": medium_value,
-                "low_value": low_value
+                "high_value": stats.high_value,
+                "medium_value": stats.medium_value,
+                "low_value": stats.low_value
             },
             "retention_metrics": {
                 "retention_rate": retention_rate,
@@ -156,40 +198,53 @@ async def get_customer_behavior(db: Session = Depends(get_db)):
         logger.error(f"Error retrieving customer behavior: {str(e)}")
         raise
 
+def _customer_detail_stmt(customer_id: int):
+    latest = (
+        select(Transaction)
+        .where(
+            Transaction.customer_id == customer_id,
+            Transaction.status == TransactionStatus.COMPLETED
+        )
+        .order_by(Transaction.timestamp.desc())
+        .limit(5)
+        .subquery()
+    )
+    recent = aliased(Transaction, latest)
+    return (
+        select(Customer, recent)
+        .outerjoin(recent, recent.customer_id == Customer.id)
+        .where(Customer.id == customer_id)
+        .order_by(recent.timestamp.desc())
+        .options(raiseload("*"))
+    )
+
 @router.get("/{customer_id}")
 async def get_customer(
-    customer_id: int,
-    db: Session = Depends(get_db)
+    customer_id: int
 ):
     """Get detailed information about a specific customer."""
+    db = get_session()
     try:
-        customer = db.query(Customer).filter(Customer.id == customer_id).first()
-        if not customer:
+        # Fetch the customer and its latest completed transactions in one round-trip;
+        # the statement is built once per process and reused with new parameters
+        rows = (await db.execute(lambda_stmt(lambda: _customer_detail_stmt(customer_id)))).all()
+        if not rows:
             raise ResourceNotFound("Customer", customer_id)
-            
-        # Get customer's recent completed transactions
-        recent_transactions = (
-            db.query(Transaction)
-            .filter(
-                Transaction.customer_id == customer_id,
-                Transaction.status == TransactionStatus.COMPLETED
-            )
-            .order_by(Transaction.timestamp.desc())
-            .limit(5)
-            .all()
-        )
+
+        customer = rows[0][0]
+        recent_transactions = [t for _, t in rows if t is not None]
         
         result = {
             "id": customer.id,
             "email": customer.email,
-            "registration_date": customer.registration_date.isoformat(),
+            "registration_date": customer.registration_date,
             "total_spent": float(customer.total_spent),
             "risk_score": float(customer.risk_score),
             "recent_transactions": [
                 {
                     "id": t.id,
                     "amount": float(t.total_amount),
-                    "timestamp": t.timestamp.isoformat(),
+                    "timestamp": t.timestamp,
                     "status": t.status,
                 }
                 for t in recent_transactions
@@ -1,10 +1,12 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Query
+from fastapi_cache.decorator import cache
 import logging
 
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal
+from app.utils.dates import DAY
 from app.utils.analytics import (
+    get_latest_transaction_time,
     get_total_sales,
     get_sales_by_hour,
     get_low_stock_products,
@@ -17,10 +19,22 @@ from app.core.exceptions import BusinessLogicError
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+TIME_WINDOWS = {
+    '24h': DAY,
+    '7d': DAY * 7,
+    '30d': DAY * 30,
+    '90d': DAY * 90
+}
+
+async def _with_session(fn, *args, **kwargs):
+    """Run an analytics helper on its own session; one AsyncSession cannot run queries concurrently."""
+    async with AsyncSessionLocal() as session:
+        return await fn(session, *args, **kwargs)
+
 @router.get("/overview")
+@cache(expire=60, namespace="dash")
 async def get_dashboard_overview(
-    time_range: str = Query('24h', regex='^(24h|7d|30d|90d)$'),
-    db: Session = Depends(get_db)
+    time_range: str = Query('24h', regex='^(24h|7d|30d|90d)$')
 ):
     """
     Get comprehensive dashboard overview including:
@@ -31,27 +45,32 @@ async def get_dashboard_overview(
     - Suspicious transactions
     """
     try:
-        # Convert time range to timedelta
-        time_windows = {
-            '24h': timedelta(days=1),
-            '7d': timedelta(days=7),
-            '30d': timedelta(days=30),
-            '90d': timedelta(days=90)
-        }
-        time_window = time_windows[time_range]
-        
-        # Gather all metrics
-        total_sales = get_total_sales(db, time_window)
-        total_sales_lifetime = get_total_sales(db)  # No time window for lifetime
+        time_window = TIME_WINDOWS[time_range]
         
         # Get hourly or daily breakdown based on time range
         hours = 24 if time_range == '24h' else time_window.days * 24
-        sales_breakdown = get_sales_by_hour(db, hours)
         
-        customer_metrics = get_customer_metrics(db)
-        transaction_metrics = get_transaction_metrics(db, time_window)
-        low_stock = get_low_stock_products(db, threshold=10)
-        suspicious = detect_suspicious_transactions(db, time_window)
+        # Anchor every windowed metric to the same instant instead of each looking it up
+        as_of = await _with_session(get_latest_transaction_time)
+        
+        # The metrics are independent, so run them concurrently on separate connections
+        (
+            total_sales,
+            total_sales_lifetime,
+            sales_breakdown,
+            customer_metrics,
+            transaction_metrics,
+            low_stock,
+            suspicious
+        ) = await asyncio.gather(
+            _with_session(get_total_sales, time_window, as_of=as_of),
+            _with_session(get_total_sales),  # No time window for lifetime
+            _with_session(get_sales_by_hour, hours, as_of=as_of),
+            _with_session(get_customer_metrics),
+            _with_session(get_transaction_metrics, time_window, as_of=as_of),
+            _with_session(get_low_stock_products, threshold=10),
+            _with_session(detect_suspicious_transactions, time_window, as_of=as_of)
+        )
         
         overview = {
             "sales": {
@@ -1,13 +1,15 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field, validator
+from fastapi import APIRouter, Query
+from fastapi_cache.decorator import cache
+from sqlalchemy import exists, select
+from pydantic import BaseModel, ConfigDict, Field, validator
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_session
 from app.models.product import Product
 from app.utils.analytics import get_low_stock_products
 from app.core.exceptions import ValidationError, BusinessLogicError, ResourceNotFound
+from app.core.responses import orjson_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -20,17 +22,16 @@ class ProductResponse(BaseModel):
     stock_quantity: int = Field(ge=0)
     supplier_id: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 @router.get("/low-stock", response_model=List[dict])
 async def get_low_stock_alerts(
-    threshold: int = Query(10, gt=0),
-    db: Session = Depends(get_db)
+    threshold: int = Query(10, gt=0)
 ):
     """Get products with stock quantity below threshold."""
+    db = get_session()
     try:
-        products = get_low_stock_products(db, threshold)
+        products = await get_low_stock_products(db, threshold)
         
         if products:
             logger.warning(
@@ -39,7 +40,7 @@ async def get_low_stock_alerts(
         else:
             logger.info(f"No products below stock threshold ({threshold})")
         
-        return products
+        return orjson_response(products)
     
     except Exception as e:
         logger.error(f"Error checking low stock products: {str(e)}")
@@ -50,51 +51,68 @@ async def get_products(
     category: Optional[str] = None,
     supplier_id: Optional[int] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, gt=0, le=1000),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, gt=0, le=1000)
 ):
     """
     Get products with optional filtering by category and supplier.
     Includes pagination support.
     """
+    db = get_session()
     try:
-        query = db.query(Product)
-        
+        query = select(
+            Product.id,
+            Product.name,
+            Product.category,
+            Product.price,
+            Product.stock_quantity,
+            Product.supplier_id
+        )
         if category:
-            # Validate category exists
-            if not db.query(Product.category).filter(Product.category == category).first():
-                raise ResourceNotFound("Category", category)
-            query = query.filter(Product.category == category)
-        
+            query = query.where(Product.category == category)
         if supplier_id:
-            # Check if supplier exists in products
-            if not db.query(Product.supplier_id).filter(Product.supplier_id == supplier_id).first():
-                raise ResourceNotFound("Supplier", supplier_id)
-            query = query.filter(Product.supplier_id == supplier_id)
+            query = query.where(Product.supplier_id == supplier_id)
+        
+        products = (await db.execute(query.offset(skip).limit(limit))).mappings().all()
         
-        total_count = query.count()
-        products = query.offset(skip).limit(limit).all()
+        if not products and (category or supplier_id):
+            # Only an empty page needs to tell an unknown filter apart from no matches
+            checks = (
+                await db.execute(
+                    select(
+                        exists().where(Product.category == category).label('category_exists'),
+                        exists().where(Product.supplier_id == supplier_id).label('supplier_exists')
+                    )
+                )
+            ).one()
+            if category and not checks.category_exists:
+                raise ResourceNotFound("Category", category)
+            if supplier_id and not checks.supplier_exists:
+                raise ResourceNotFound("Supplier", supplier_id)
         
         logger.info(
-            f"Retrieved products: count={len(products)}, total={total_count}, "
+            f"Retrieved products: count={len(products)}, "
             f"category={category}, supplier_id={supplier_id}"
         )
         
-        return products
+        return orjson_response([dict(p) for p in products])
     
     except Exception as e:
         logger.error(f"Error retrieving products: {str(e)}")
         raise
 
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+@cache(expire=600, namespace="inventory")
+async def get_categories():
     """Get list of unique product categories."""
+    db = get_session()
     try:
-        categories = db.query(Product.category).distinct().all()
-        categories = [cat[0] for cat in categories]
+        # Ordered DISTINCT can walk ix_product_category instead of hashing the table
+        categories = (
+            await db.execute(select(Product.category).distinct().order_by(Product.category))
+        ).scalars().all()
         
         logger.info(f"Retrieved {len(categories)} unique product categories")
-        return categories
+        return orjson_response(categories)
     
     except Exception as e:
         logger.error(f"Error retrieving product categories: {str(e)}")
@@ -1,16 +1,20 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field, validator
+from fastapi import APIRouter, Query
+from sqlalchemy import exists, lambda_stmt, select, update
+from sqlalchemy.orm import raiseload
+from pydantic import BaseModel, ConfigDict, Field, validator
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_session
+from app.utils.dates import HOUR, utcnow
 from app.models.transaction import Transaction, PaymentMethod, TransactionStatus
 from app.models.product import Product
 from app.models.customer import Customer
-from app.utils.analytics import detect_suspicious_transactions
+from app.utils.analytics import suspicious_transactions_query, serialize_suspicious_transaction
 from app.core.exceptions import ResourceNotFound, ValidationError, BusinessLogicError
+from app.core.responses import orjson_response, stream_json_array
+from app.core.cache import invalidate_cache
 from app.services.fraud_detection import FraudDetectionService
 from app.models.alert import Alert, AlertType
 
@@ -18,6 +22,8 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 class TransactionCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     customer_id: int
     product_id: int
     quantity: int = Field(gt=0)
@@ -48,34 +54,60 @@ class TransactionResponse(BaseModel):
     total_amount: float
     fraud_check_result: Optional[Dict] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+def serialize_transaction(transaction: Transaction) -> dict:
+    """Build the TransactionResponse payload from an ORM row without pydantic validation."""
+    return {
+        "id": transaction.id,
+        "customer_id": transaction.customer_id,
+        "product_id": transaction.product_id,
+        "quantity": transaction.quantity,
+        "price": transaction.price,
+        "payment_method": transaction.payment_method,
+        "status": transaction.status,
+        "timestamp": transaction.timestamp,
+        "total_amount": transaction.total_amount,
+        "fraud_check_result": transaction.fraud_check_result
+    }
 
 @router.post("/", response_model=TransactionResponse)
 async def create_transaction(
-    transaction: TransactionCreate,
-    db: Session = Depends(get_db)
+    transaction: TransactionCreate
 ):
     """Create a new transaction with fraud detection."""
-    # Validate customer exists
-    customer = db.query(Customer).filter(Customer.id == transaction.customer_id).first()
-    if not customer:
+    db = get_session()
+    customer_id, product_id = transaction.customer_id, transaction.product_id
+    # Validate customer and product existence and read stock in one round-trip
+    # (lambda_stmt caches the statement construction and its compiled SQL)
+    checks = (
+        await db.execute(
+            lambda_stmt(
+                lambda: select(
+                    exists().where(Customer.id == customer_id).label('customer_exists'),
+                    exists().where(Product.id == product_id).label('product_exists'),
+                    select(Product.stock_quantity)
+                    .where(Product.id == product_id)
+                    .scalar_subquery()
+                    .label('stock_quantity')
+                )
+            )
+        )
+    ).one()
+    if not checks.customer_exists:
         raise ResourceNotFound("Customer", transaction.customer_id)
-
-    # Validate product exists and has sufficient stock
-    product = db.query(Product).filter(Product.id == transaction.product_id).first()
-    if not product:
+    if not checks.product_exists:
         raise ResourceNotFound("Product", transaction.product_id)
     
-    if product.stock_quantity < transaction.quantity:
+    if checks.stock_quantity < transaction.quantity:
         raise BusinessLogicError(
-            f"Insufficient stock. Available: {product.stock_quantity}, Requested: {transaction.quantity}"
+            f"Insufficient stock. Available: {checks.stock_quantity}, Requested: {transaction.quantity}"
         )
 
     try:
         # Check for potential fraud
         fraud_service = FraudDetectionService(db)
-        fraud_check = fraud_service.analyze_transaction(
+        fraud_check = await fraud_service.analyze_transaction(
             customer_id=transaction.customer_id,
             amount=transaction.price * transaction.quantity
         )
@@ -105,86 +137,115 @@ async def create_transaction(
             price=transaction.price,
             payment_method=transaction.payment_method,
             status=initial_status,
-            timestamp=datetime.utcnow()
+            timestamp=utcnow()
         )
         
         # Set fraud check result using property
         db_transaction.fraud_check_result = fraud_check
         
-        # Update product stock
-        product.stock_quantity -= transaction.quantity
+        # Decrement stock atomically; the guard fails if a concurrent order took the stock
+        remaining_stock = await db.scalar(
+            update(Product)
+            .where(
+                Product.id == transaction.product_id,
+                Product.stock_quantity >= transaction.quantity
+            )
+            .values(stock_quantity=Product.stock_quantity - transaction.quantity)
+            .returning(Product.stock_quantity)
+        )
+        if remaining_stock is None:
+            raise BusinessLogicError(
+                f"Insufficient stock. Requested: {transaction.quantity}"
+            )
         
         db.add(db_transaction)
-        db.commit()
-        db.refresh(db_transaction)
+        await db.commit()
+        await db.refresh(db_transaction)
+        
+        # Dashboard totals include this transaction now
+        await invalidate_cache("dash")
         
         # Log appropriate message based on fraud check
         if fraud_check["is_suspicious"]:
             logger.warning(
                 f"Suspicious transaction created: ID={db_transaction.id}, "
                 f"Amount=${db_transaction.total_amount:.2f}, "
-                f"Customer={customer.id}, "
+                f"Customer={transaction.customer_id}, "
                 f"Reasons={fraud_check['reasons']}"
             )
         else:
             logger.info(
                 f"Transaction created: ID={db_transaction.id}, "
                 f"Amount=${db_transaction.total_amount:.2f}, "
-                f"Customer={customer.id}"
+                f"Customer={transaction.customer_id}"
             )
         
-        return db_transaction
+        return orjson_response(serialize_transaction(db_transaction))
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Failed to create transaction: {str(e)}")
         raise
 
 @router.get("/suspicious", response_model=List[dict])
 async def get_suspicious_transactions(
     hours: int = Query(24, gt=0, le=168),  # Max 1 week lookback
-    db: Session = Depends(get_db)
 ):
     """Get suspicious transactions from the last n hours."""
+    db = get_session()
     try:
-        suspicious = detect_suspicious_transactions(db, timedelta(hours=hours))
-        if suspicious:
-            logger.warning(f"Found {len(suspicious)} suspicious transactions in the last {hours} hours")
-        return suspicious
+        query = await suspicious_transactions_query(db, HOUR * hours)
+        if query is None:
+            return orjson_response([])
+        
+        # Stream rows from a server-side cursor instead of materializing the whole window
+        rows = await db.stream(query.execution_options(yield_per=500))
+        logger.info(f"Streaming suspicious transactions for the last {hours} hours")
+        return stream_json_array(serialize_suspicious_transaction(row) async for row in rows)
     except Exception as e:
         logger.error(f"Error detecting suspicious transactions: {str(e)}")
         raise
 
 @router.get("/recent", response_model=List[dict])
 async def get_recent_transactions(
-    limit: int = Query(10, gt=0, le=50),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, gt=0, le=50)
 ):
     """Get recent transactions with customer details."""
+    db = get_session()
     try:
+        # Project only the returned columns; no Transaction/Customer entities are built
         transactions = (
-            db.query(Transaction, Customer)
-            .join(Customer)
-            .order_by(Transaction.timestamp.desc())
-            .limit(limit)
-            .all()
-        )
+            await db.execute(
+                select(
+                    Transaction.id,
+                    Customer.email,
+                    (Transaction.price * Transaction.quantity).label('amount'),
+                    Transaction.status,
+                    Transaction.timestamp,
+                    Transaction.quantity,
+                    Transaction.payment_method
+                )
+                .join(Customer, Customer.id == Transaction.customer_id)
+                .order_by(Transaction.timestamp.desc())
+                .limit(limit)
+            )
+        ).all()
 
         result = [
             {
-                'id': t.Transaction.id,
-                'customer_email': t.Customer.email,
-                'amount': float(t.Transaction.total_amount),
-                'status': t.Transaction.status,
-                'timestamp': t.Transaction.timestamp.isoformat(),
-                'items': t.Transaction.quantity,
-                'payment_method': t.Transaction.payment_method
+                'id': t.id,
+                'customer_email': t.email,
+                'amount': float(t.amount),
+                'status': t.status,
+                'timestamp': t.timestamp,
+                'items': t.quantity,
+                'payment_method': t.payment_method
             }
             for t in transactions
         ]
 
         logger.info(f"Retrieved {len(result)} recent transactions")
-        return result
+        return orjson_response(result)
 
     except Exception as e:
         logger.error(f"Error retrieving recent transactions: {str(e)}")
@@ -192,11 +253,19 @@ async def get_recent_transactions(
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
-    transaction_id: int,
-    db: Session = Depends(get_db)
+    transaction_id: int
 ):
     """Get a specific transaction by ID."""
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    db = get_session()
+    transaction = (
+        await db.execute(
+            lambda_stmt(
+                lambda: select(Transaction)
+                .where(Transaction.id == transaction_id)
+                .options(raiseload("*"))
+            )
+        )
+    ).scalar_one_or_none()
     if not transaction:
         raise ResourceNotFound("Transaction", transaction_id)
-    return transaction 
\ No newline at end of file
+    return orjson_response(serialize_transaction(transaction)) 
\ No newline at end of file
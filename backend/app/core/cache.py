@@ -0,0 +1,113 @@
+import logging
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import orjson
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.coder import Coder
+from redis import asyncio as aioredis
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ORJSONCoder(Coder):
+    """Store rendered JSON bodies and replay them without re-serializing"""
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        if isinstance(value, Response):
+            return value.body
+        return ORJSONResponse(content=value).body
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        return orjson.loads(value)
+
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_: Optional[type]) -> Any:
+        # Cached bytes are already valid JSON, hand them straight back
+        return Response(content=value, media_type="application/json")
+
+
+def query_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Tuple[Any, ...] = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Build cache keys from the endpoint's query parameters."""
+    params = ":".join(
+        f"{name}={value}"
+        for name, value in sorted((kwargs or {}).items())
+    )
+    return f"{namespace}:{func.__module__}.{func.__name__}:{params}"
+
+
+async def init_cache() -> None:
+    """Initialize the response cache, using process memory when Redis is not configured."""
+    if settings.REDIS_URL:
+        backend = RedisBackend(aioredis.from_url(settings.REDIS_URL))
+    else:
+        backend = InMemoryBackend()
+    FastAPICache.init(
+        backend,
+        prefix="techmart",
+        coder=ORJSONCoder,
+        key_builder=query_key_builder
+    )
+
+
+async def invalidate_cache(namespace: str) -> None:
+    """Drop cached responses in a namespace; a cache outage must not fail the caller's write."""
+    try:
+        await FastAPICache.clear(namespace=namespace)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate cache namespace '{namespace}': {str(e)}")
+
+
+def cached_result(expire: int, namespace: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Cache a JSON-serializable async query helper in the response cache backend.
+
+    The helper's first argument is its session and is left out of the key, so
+    callers share entries across requests (and across workers with Redis).
+    Entries live in `namespace`, so invalidate_cache(namespace) drops them too.
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @wraps(func)
+        async def wrapper(db: Any, *args: Any, **kwargs: Any) -> T:
+            params = ":".join(
+                [repr(arg) for arg in args]
+                + [f"{name}={value!r}" for name, value in sorted(kwargs.items())]
+            )
+            try:
+                backend = FastAPICache.get_backend()
+                key = f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}.{func.__name__}:{params}"
+                cached = await backend.get(key)
+            except Exception as e:
+                # Cache not initialised (scripts) or unavailable; fall through to the query
+                logger.debug(f"Cache lookup skipped for {func.__name__}: {str(e)}")
+                return await func(db, *args, **kwargs)
+
+            if cached is not None:
+                return orjson.loads(cached)
+
+            result = await func(db, *args, **kwargs)
+            try:
+                await backend.set(key, orjson.dumps(result), expire)
+            except Exception as e:
+                logger.warning(f"Failed to cache {func.__name__}: {str(e)}")
+            return result
+        return wrapper
+    return decorator
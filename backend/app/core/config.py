@@ -1,3 +1,5 @@
+from functools import lru_cache
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional, List
 import secrets
@@ -7,6 +9,7 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "TechMart Analytics"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    ENVIRONMENT: str = "development"
     
     POSTGRES_SERVER: str = "localhost"
     POSTGRES_USER: str = "postgres"
@@ -16,13 +19,29 @@ class Settings(BaseSettings):
     
     DATABASE_URL: Optional[str] = None
     
+    # Connection pool for the API's async engine
+    DB_POOL_SIZE: int = 25
+    DB_MAX_OVERFLOW: int = 25
+    DB_POOL_TIMEOUT: int = 10  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; replace connections before server-side idle kills
+    
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         if self.DATABASE_URL:
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
-    SECRET_KEY: str = secrets.token_urlsafe(32)
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        # Same database, reached through the asyncpg driver
+        _, _, location = self.SQLALCHEMY_DATABASE_URI.partition("://")
+        return f"postgresql+asyncpg://{location}"
+
+    REDIS_URL: Optional[str] = None
+    ANALYTICS_CACHE_TTL: int = 30  # seconds to reuse dashboard aggregate queries
+
+    # Generated per process when unset, so every worker would sign with a different key
+    SECRET_KEY: str = Field(default_factory=lambda: secrets.token_urlsafe(32))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
     
     # CORS settings
@@ -32,9 +51,22 @@ class Settings(BaseSettings):
     def CORS_ORIGINS_LIST(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
     
+    @model_validator(mode="after")
+    def require_secret_key_in_production(self) -> "Settings":
+        if self.ENVIRONMENT == "production" and "SECRET_KEY" not in self.model_fields_set:
+            raise ValueError("SECRET_KEY must be set explicitly in production")
+        return self
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
 
 
-settings = Settings() 
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    """Parse the environment once and share the Settings instance."""
+    return Settings()
+
+
+settings = get_settings()
+ 
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import HTTPException, Request, status
-from fastapi.responses import JSONResponse
 from typing import Any, Dict, Optional
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
+from app.core.responses import ORJSONResponse
+
 class TechMartException(HTTPException):
     """Base exception for TechMart application"""
     def __init__(
@@ -57,7 +58,7 @@ class BusinessLogicError(TechMartException):
 
 async def techmart_exception_handler(request: Request, exc: TechMartException):
     """Handler for TechMart custom exceptions"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -75,7 +76,7 @@ async def sqlalchemy_error_handler(request: Request, exc: SQLAlchemyError):
     if isinstance(exc, IntegrityError):
         error_detail = "Data integrity error: Possible duplicate or invalid reference"
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": {
@@ -88,7 +89,7 @@ async def sqlalchemy_error_handler(request: Request, exc: SQLAlchemyError):
 
 async def validation_exception_handler(request: Request, exc: ValidationError):
     """Handler for validation errors"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": {
@@ -0,0 +1,56 @@
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Docs, schema and root hits are logged at DEBUG so they do not swamp the request log
+_QUIET_PATH_PREFIXES = ("/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json")
+
+
+class RequestLoggingMiddleware:
+    """
+    Log method, path, status and duration for every HTTP request.
+
+    Written as plain ASGI so each request avoids the extra task and the
+    Request/Response wrappers that @app.middleware("http") adds.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        # Unhandled exceptions never reach http.response.start here; report them as 500
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = scope["path"]
+            duration_ms = (time.perf_counter() - start_time) * 1000
+
+            # Log client errors (4xx) and server errors (5xx) as warnings/errors
+            if path == "/" or path.startswith(_QUIET_PATH_PREFIXES):
+                level, label = logging.DEBUG, "Request processed"
+            elif 400 <= status_code < 500:
+                level, label = logging.WARNING, "Client Error"
+            elif status_code >= 500:
+                level, label = logging.ERROR, "Server Error"
+            else:
+                level, label = logging.INFO, "Request processed"
+
+            # %-style arguments are only formatted when the level is enabled
+            logger.log(level, "%s: %s %s %d %.2fms", label, scope["method"], path, status_code, duration_ms)
@@ -0,0 +1,53 @@
+from decimal import Decimal
+from typing import Any, AsyncIterable
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse, StreamingResponse
+
+
+def _default(obj: Any) -> Any:
+    """Serialize values orjson does not handle natively (datetime is native)."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """ORJSONResponse that also accepts Decimal values coming from SQL aggregates"""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def orjson_response(payload: Any, status_code: int = 200) -> ORJSONResponse:
+    """
+    Serialize a payload directly with orjson.
+
+    Returning a Response from an endpoint skips FastAPI's jsonable_encoder walk
+    and response_model re-validation, so build plain dicts/lists before calling.
+    """
+    return ORJSONResponse(content=payload, status_code=status_code)
+
+
+async def _json_array_chunks(items: AsyncIterable[Any], batch_size: int) -> AsyncIterable[bytes]:
+    yield b"["
+    batch = []
+    separator = b""
+    async for item in items:
+        batch.append(orjson.dumps(item, default=_default, option=orjson.OPT_NON_STR_KEYS))
+        if len(batch) >= batch_size:
+            yield separator + b",".join(batch)
+            separator = b","
+            batch.clear()
+    if batch:
+        yield separator + b",".join(batch)
+    yield b"]"
+
+
+def stream_json_array(items: AsyncIterable[Any], batch_size: int = 500) -> StreamingResponse:
+    """
+    Stream a JSON array, serializing items as they arrive.
+
+    Only one batch of encoded items is held in memory at a time, so pair this
+    with a server-side cursor (AsyncSession.stream / yield_per) for large result sets.
+    """
+    return StreamingResponse(_json_array_chunks(items, batch_size), media_type="application/json")
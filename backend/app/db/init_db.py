@@ -9,6 +9,7 @@ from app.models.product import Product
 from app.models.customer import Customer
 from app.models.transaction import Transaction
 from app.models.supplier import Supplier
+from app.models.alert import Alert
 
 
 def init_db() -> None:
@@ -0,0 +1,28 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.db.session import AsyncSessionLocal, session_ctx
+
+
+class DBSessionMiddleware:
+    """
+    Bind one AsyncSession per HTTP request to a context variable.
+
+    Endpoints fetch it with get_session() instead of going through the
+    dependency resolver on every call. The session is closed once the
+    response has been sent; committing stays the endpoint's job.
+    """
+    def __init__(self, app: ASGIApp, session_factory=AsyncSessionLocal):
+        self.app = app
+        self.session_factory = session_factory
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async with self.session_factory() as session:
+            token = session_ctx.set(session)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                session_ctx.reset(token)
@@ -1,24 +1,55 @@
+from contextvars import ContextVar
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
-from app.db.base import Base
 
+# Bulk paths (imports, recalculations) send executemany batches: INSERTs go out as
+# multi-row VALUES pages and, on psycopg2, UPDATE/DELETE batches use execute_batch
+_bulk_options = {"insertmanyvalues_page_size": 1000}
+if make_url(settings.SQLALCHEMY_DATABASE_URI).get_driver_name() == "psycopg2":
+    _bulk_options.update(
+        executemany_mode="values_plus_batch",
+        executemany_batch_page_size=500
+    )
+
+# Sync engine for scripts, management commands and schema creation
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
     pool_pre_ping=True,
     pool_size=10,
-    max_overflow=20
+    max_overflow=20,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **_bulk_options
 )
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
-
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API so DB I/O does not block the event loop
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # Reuse the most recently returned connection so surplus ones sit idle and get recycled
+    pool_use_lifo=True
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Request-scoped session, bound by DBSessionMiddleware
+session_ctx: ContextVar[AsyncSession] = ContextVar("db_session")
+
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+def get_session() -> AsyncSession:
+    """Return the session bound to the current request."""
+    return session_ctx.get()
@@ -6,6 +6,9 @@ from .product import Product
 from .customer import Customer
 from .transaction import Transaction, TransactionStatus, PaymentMethod
 from .supplier import Supplier
+from .daily_sales import daily_sales
+from .hourly_sales import hourly_sales
+from .customer_stats import customer_stats
 from . import events  # Import event listeners
 
 __all__ = [
@@ -14,5 +17,8 @@ __all__ = [
     "Transaction",
     "TransactionStatus",
     "PaymentMethod",
-    "Supplier"
+    "Supplier",
+    "daily_sales",
+    "hourly_sales",
+    "customer_stats"
 ] 
\ No newline at end of file
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
 import enum
 from app.db.base import Base
+from app.utils.dates import utcnow
 
 
 class AlertType(str, enum.Enum):
@@ -18,8 +18,12 @@ class Alert(Base):
     message = Column(String)
     severity = Column(String)  # 'info', 'warning', 'error'
     alert_metadata = Column(JSON, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
     resolved_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_alert_created_type_sev", created_at.desc(), type, severity),
+    )
+
     def __repr__(self):
         return f"<Alert {self.id}: {self.type} - {self.severity}>" 
\ No newline at end of file
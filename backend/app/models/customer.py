@@ -1,18 +1,37 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, DDL, Index, event
 from sqlalchemy.orm import relationship
-from datetime import datetime
 from app.db.base import Base
+from app.utils.dates import utcnow
 
 
 class Customer(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
-    registration_date = Column(DateTime, default=datetime.utcnow)
+    registration_date = Column(DateTime, default=utcnow)
     total_spent = Column(Float, default=0.0)
     risk_score = Column(Float, default=0.0)
+    region = Column(String, nullable=True)  # optional; imported when customers.csv has it
     
     # Relationships
     transactions = relationship("Transaction", back_populates="customer")
+
+    # Trigram index so substring ILIKE searches on email avoid a sequential scan
+    __table_args__ = (
+        Index(
+            "ix_customer_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+    )
     
     def __repr__(self):
-        return f"<Customer {self.email}>" 
\ No newline at end of file
+        return f"<Customer {self.email}>"
+
+
+# gin_trgm_ops needs the pg_trgm extension before the table's indexes are created
+event.listen(
+    Customer.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
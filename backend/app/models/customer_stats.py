@@ -0,0 +1,46 @@
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, DDL, event, text
+from app.db.base import Base
+
+
+CREATE_CUSTOMER_STATS_VIEW = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS customer_stats_mv AS
+SELECT
+    customer_id,
+    sum(price * quantity) AS total_spent,
+    count(*) AS purchase_count,
+    max(timestamp) AS last_purchase_at
+FROM transaction
+WHERE status = 'completed'
+GROUP BY customer_id
+"""
+
+CREATE_CUSTOMER_STATS_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_customer_stats_mv_customer_id ON customer_stats_mv (customer_id)",
+    "CREATE INDEX IF NOT EXISTS ix_customer_stats_mv_total_spent ON customer_stats_mv (total_spent)",
+    "CREATE INDEX IF NOT EXISTS ix_customer_stats_mv_last_purchase_at ON customer_stats_mv (last_purchase_at)",
+)
+
+# Read-only mapping of the customer_stats_mv materialized view (completed
+# transactions only), kept off Base.metadata like mv_daily_sales.
+customer_stats = Table(
+    "customer_stats_mv",
+    MetaData(),
+    Column("customer_id", Integer, primary_key=True),
+    Column("total_spent", Float),
+    Column("purchase_count", Integer),
+    Column("last_purchase_at", DateTime),
+)
+
+
+def refresh_customer_stats(connection) -> None:
+    """Rebuild customer_stats_mv without blocking readers."""
+    connection.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY customer_stats_mv"))
+
+
+# Create the view alongside the tables when the schema is built with create_all
+for statement in (CREATE_CUSTOMER_STATS_VIEW, *CREATE_CUSTOMER_STATS_INDEXES):
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
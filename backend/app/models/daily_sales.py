@@ -0,0 +1,48 @@
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, DDL, event, text
+from app.db.base import Base
+
+
+CREATE_DAILY_SALES_VIEW = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_daily_sales AS
+SELECT
+    date_trunc('day', timestamp) AS day,
+    product_id,
+    customer_id,
+    sum(price * quantity) AS revenue,
+    sum(quantity) AS units,
+    count(*) AS txn_count
+FROM transaction
+GROUP BY 1, 2, 3
+"""
+
+CREATE_DAILY_SALES_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_daily_sales_day_product_customer "
+    "ON mv_daily_sales (day, product_id, customer_id)"
+)
+
+# Read-only mapping of the mv_daily_sales materialized view. It lives on its own
+# MetaData so create_all never tries to build it as a regular table.
+daily_sales = Table(
+    "mv_daily_sales",
+    MetaData(),
+    Column("day", DateTime, primary_key=True),
+    Column("product_id", Integer, primary_key=True),
+    Column("customer_id", Integer, primary_key=True),
+    Column("revenue", Float),
+    Column("units", Integer),
+    Column("txn_count", Integer),
+)
+
+
+def refresh_daily_sales(connection) -> None:
+    """Rebuild mv_daily_sales without blocking readers."""
+    connection.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_daily_sales"))
+
+
+# Create the view alongside the tables when the schema is built with create_all
+for statement in (CREATE_DAILY_SALES_VIEW, CREATE_DAILY_SALES_INDEX):
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
@@ -1,45 +1,100 @@
 from sqlalchemy import event
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy import func, select, update
 
 from .transaction import Transaction, TransactionStatus
 from .customer import Customer
 
-def update_customer_total_spent(customer_id: int, session: Session) -> None:
-    """Update customer's total_spent based on completed transactions."""
-    total = (
-        session.query(func.sum(Transaction.price * Transaction.quantity))
-        .filter(
-            Transaction.customer_id == customer_id,
-            Transaction.status == TransactionStatus.COMPLETED
-        )
-        .scalar() or 0.0
+# Amount-affecting columns; their pre-update values feed the total_spent delta
+_AMOUNT_ATTRIBUTES = ('customer_id', 'price', 'quantity', 'status')
+
+def _completed_amount(status, price, quantity) -> float:
+    """Amount a transaction contributes to total_spent (only completed ones count)."""
+    if status != TransactionStatus.COMPLETED or price is None or quantity is None:
+        return 0.0
+    return price * quantity
+
+def _previous_value(target: Transaction, key: str):
+    """Value of an attribute before the pending flush."""
+    history = get_history(target, key)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, key)
+
+def _add_to_total_spent(connection, customer_id: int, amount: float) -> None:
+    """Apply an amount delta to a customer's total_spent on the flush's connection."""
+    if not amount or customer_id is None:
+        return
+    connection.execute(
+        update(Customer)
+        .where(Customer.id == customer_id)
+        .values(total_spent=func.coalesce(Customer.total_spent, 0.0) + amount)
     )
-    
-    customer = session.query(Customer).filter(Customer.id == customer_id).first()
-    if customer:
-        customer.total_spent = float(total)
+
+def _track_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# Load the old value when one of these attributes is assigned on an expired
+# instance; otherwise its history has no "deleted" side to compute a delta from
+for _key in _AMOUNT_ATTRIBUTES:
+    event.listen(getattr(Transaction, _key), 'set', _track_previous_value, active_history=True)
 
 @event.listens_for(Transaction, 'after_insert')
 def after_transaction_insert(mapper, connection, target):
-    """Update customer total_spent after transaction insert."""
-    if target.status == TransactionStatus.COMPLETED:
-        session = Session(bind=connection)
-        update_customer_total_spent(target.customer_id, session)
-        session.commit()
-        session.close()
+    """Add a completed transaction's amount to its customer's total_spent."""
+    # Apply the new row as a delta on the flush's connection instead of re-summing history
+    _add_to_total_spent(
+        connection,
+        target.customer_id,
+        _completed_amount(target.status, target.price, target.quantity)
+    )
 
 @event.listens_for(Transaction, 'after_update')
 def after_transaction_update(mapper, connection, target):
-    """Update customer total_spent after transaction status update."""
-    session = Session(bind=connection)
-    update_customer_total_spent(target.customer_id, session)
-    session.commit()
-    session.close()
-
-def recalculate_all_customer_totals(session: Session) -> None:
-    """Recalculate total_spent for all customers."""
-    customers = session.query(Customer).all()
-    for customer in customers:
-        update_customer_total_spent(customer.id, session)
+    """Move total_spent by the difference between the old and new transaction amount."""
+    # Updates that leave amount-affecting columns alone cannot change total_spent
+    if not any(get_history(target, key).has_changes() for key in _AMOUNT_ATTRIBUTES):
+        return
+    
+    old_customer_id = _previous_value(target, 'customer_id')
+    old_amount = _completed_amount(
+        _previous_value(target, 'status'),
+        _previous_value(target, 'price'),
+        _previous_value(target, 'quantity')
+    )
+    new_amount = _completed_amount(target.status, target.price, target.quantity)
+    
+    if old_customer_id == target.customer_id:
+        _add_to_total_spent(connection, target.customer_id, new_amount - old_amount)
+    else:
+        _add_to_total_spent(connection, old_customer_id, -old_amount)
+        _add_to_total_spent(connection, target.customer_id, new_amount)
+
+def recalculate_all_customer_totals(session: Session, only_with_completed: bool = False) -> None:
+    """
+    Recalculate total_spent for all customers.
+
+    With only_with_completed, customers without completed transactions keep
+    their stored total instead of being reset to 0.
+    """
+    # One set-based UPDATE; unless restricted, customers without completed transactions get 0
+    completed_total = (
+        select(func.coalesce(func.sum(Transaction.price * Transaction.quantity), 0.0))
+        .where(
+            Transaction.customer_id == Customer.id,
+            Transaction.status == TransactionStatus.COMPLETED
+        )
+        .scalar_subquery()
+    )
+    stmt = update(Customer).values(total_spent=completed_total)
+    if only_with_completed:
+        stmt = stmt.where(Customer.id.in_(
+            select(Transaction.customer_id)
+            .where(Transaction.status == TransactionStatus.COMPLETED)
+        ))
+    session.execute(
+        stmt,
+        execution_options={"synchronize_session": False}
+    )
     session.commit() 
\ No newline at end of file
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, DDL, event, text
+from app.db.base import Base
+
+
+CREATE_HOURLY_SALES_VIEW = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_hourly_sales AS
+SELECT
+    date_trunc('hour', timestamp) AS hour,
+    sum(price * quantity) AS total_sales,
+    count(*) AS num_transactions
+FROM transaction
+GROUP BY 1
+"""
+
+CREATE_HOURLY_SALES_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_hourly_sales_hour "
+    "ON mv_hourly_sales (hour)"
+)
+
+# Read-only mapping of the mv_hourly_sales materialized view, kept off
+# Base.metadata for the same reason as mv_daily_sales.
+hourly_sales = Table(
+    "mv_hourly_sales",
+    MetaData(),
+    Column("hour", DateTime, primary_key=True),
+    Column("total_sales", Float),
+    Column("num_transactions", Integer),
+)
+
+
+def refresh_hourly_sales(connection) -> None:
+    """Rebuild mv_hourly_sales without blocking readers."""
+    connection.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_hourly_sales"))
+
+
+# Create the view alongside the tables when the schema is built with create_all
+for statement in (CREATE_HOURLY_SALES_VIEW, CREATE_HOURLY_SALES_INDEX):
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
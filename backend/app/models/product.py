@@ -8,7 +8,7 @@ class Product(Base):
     name = Column(String, index=True)
     category = Column(String, index=True)
     price = Column(Float)
-    stock_quantity = Column(Integer)
+    stock_quantity = Column(Integer, index=True)  # low-stock threshold scans
     supplier_id = Column(Integer, ForeignKey("supplier.id"))
     
     # Relationships
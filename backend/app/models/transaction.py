@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import enum
 from app.db.base import Base
+from app.utils.dates import utcnow
 
 
 class TransactionStatus(str, enum.Enum):
@@ -22,6 +22,23 @@ class PaymentMethod(str, enum.Enum):
     BANK_TRANSFER = "bank_transfer"
 
 
+def _string_enum(enum_class, constraint_name: str) -> Enum:
+    """
+    Store an enum as its lowercase value in a VARCHAR guarded by a CHECK constraint.
+
+    Unlike a native Postgres ENUM, adding a member only needs the constraint
+    replaced, not an ALTER TYPE; reads still come back as enum members.
+    """
+    return Enum(
+        enum_class,
+        name=constraint_name,
+        native_enum=False,
+        create_constraint=True,
+        length=16,
+        values_callable=lambda members: [member.value for member in members],
+    )
+
+
 class Transaction(Base):
     __tablename__ = "transaction"
 
@@ -30,13 +47,42 @@ class Transaction(Base):
     product_id = Column(Integer, ForeignKey("product.id"))
     quantity = Column(Integer)
     price = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING)
-    payment_method = Column(Enum(PaymentMethod))
+    timestamp = Column(DateTime, default=utcnow, index=True)
+    status = Column(_string_enum(TransactionStatus, "ck_tx_status"), default=TransactionStatus.PENDING)
+    payment_method = Column(_string_enum(PaymentMethod, "ck_tx_payment_method"))
     
     # Relationships
     customer = relationship("Customer", back_populates="transactions")
     product = relationship("Product", back_populates="transactions")
+
+    # Covering indexes for the time-windowed analytics aggregations
+    __table_args__ = (
+        Index(
+            "ix_transaction_timestamp_customer",
+            timestamp.desc(), customer_id,
+            # id and status let the suspicious-transaction window run as an index-only scan
+            postgresql_include=["id", "product_id", "price", "quantity", "status"],
+        ),
+        Index(
+            "ix_transaction_timestamp_product",
+            timestamp.desc(), product_id,
+            postgresql_include=["price", "quantity"],
+        ),
+        # Completed-only partial index for retention and completed-sales windows
+        Index(
+            "ix_tx_status_ts",
+            status, timestamp.desc(),
+            postgresql_where=status == TransactionStatus.COMPLETED,
+        ),
+        # Per-customer "latest completed transactions" lookups
+        Index("ix_tx_customer_status_ts", customer_id, status, timestamp.desc()),
+        # Fraud checks: per-customer velocity window and price statistics
+        Index(
+            "ix_tx_customer_timestamp",
+            customer_id, timestamp,
+            postgresql_include=["price"],
+        ),
+    )
     
     # In-memory storage for fraud check result
     _fraud_check_result = None
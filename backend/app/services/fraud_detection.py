@@ -1,35 +1,42 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-import statistics
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from app.models.transaction import Transaction
 from app.models.customer import Customer
+from app.utils.dates import utcnow
 
 class FraudDetectionService:
-    def __init__(self, db: Session):
+    # Thresholds are constants, so keep them on the class instead of every instance
+    velocity_window_minutes = 60  # Time window for velocity check
+    max_transactions_per_window = 5  # Max transactions in window
+    amount_std_dev_threshold = 2.0  # Standard deviations above mean for amount anomaly
+    min_customer_transactions = 3  # Minimum transactions needed for amount analysis
+    velocity_window = timedelta(minutes=velocity_window_minutes)
+
+    def __init__(self, db: AsyncSession):
         self.db = db
-        # Configurable thresholds
-        self.velocity_window_minutes = 60  # Time window for velocity check
-        self.max_transactions_per_window = 5  # Max transactions in window
-        self.amount_std_dev_threshold = 2.0  # Standard deviations above mean for amount anomaly
-        self.min_customer_transactions = 3  # Minimum transactions needed for amount analysis
 
-    def check_transaction_velocity(self, customer_id: int) -> Dict:
+    async def check_transaction_velocity(self, customer_id: int, now: Optional[datetime] = None) -> Dict:
         """
-        Check if customer has made too many transactions in the time window.
+        Check if customer has made too many transactions in the time window
+        ending at `now` (defaults to the current time).
         Returns dict with is_suspicious flag and details.
         """
-        window_start = datetime.utcnow() - timedelta(minutes=self.velocity_window_minutes)
+        window_start = (now or utcnow()) - self.velocity_window
         
-        # Count transactions in window
-        transaction_count = (
-            self.db.query(Transaction)
-            .filter(
+        # Count transactions in window, stopping once the threshold is reached
+        recent_transactions = (
+            select(Transaction.id)
+            .where(
                 Transaction.customer_id == customer_id,
                 Transaction.timestamp >= window_start
             )
-            .count()
+            .limit(self.max_transactions_per_window)
+            .subquery()
+        )
+        transaction_count = await self.db.scalar(
+            select(func.count()).select_from(recent_transactions)
         )
 
         is_suspicious = transaction_count >= self.max_transactions_per_window
@@ -44,34 +51,37 @@ class FraudDetectionService:
             }
         }
 
-    def check_amount_anomaly(self, customer_id: int, current_amount: float) -> Dict:
+    async def check_amount_anomaly(self, customer_id: int, current_amount: float) -> Dict:
         """
         Check if transaction amount is anomalous compared to customer's history.
         Returns dict with is_suspicious flag and details.
         """
-        # Get customer's transaction history
-        customer_transactions = (
-            self.db.query(Transaction.price)
-            .filter(Transaction.customer_id == customer_id)
-            .all()
-        )
-        
-        transaction_amounts = [t[0] for t in customer_transactions]
+        # Summarize the customer's price history in the database
+        transaction_count, mean_amount, std_dev = (
+            await self.db.execute(
+                select(
+                    func.count(Transaction.price),
+                    func.avg(Transaction.price),
+                    func.stddev_samp(Transaction.price)
+                )
+                .where(Transaction.customer_id == customer_id)
+            )
+        ).one()
         
         # Not enough history for meaningful analysis
-        if len(transaction_amounts) < self.min_customer_transactions:
+        if transaction_count < self.min_customer_transactions:
             return {
                 "is_suspicious": False,
                 "reason": None,
                 "details": {
                     "message": "Insufficient transaction history",
-                    "transaction_count": len(transaction_amounts)
+                    "transaction_count": transaction_count
                 }
             }
         
         # Calculate statistics
-        mean_amount = statistics.mean(transaction_amounts)
-        std_dev = statistics.stdev(transaction_amounts)
+        mean_amount = float(mean_amount)
+        std_dev = float(std_dev or 0)
         z_score = (current_amount - mean_amount) / std_dev if std_dev > 0 else 0
         
         is_suspicious = z_score > self.amount_std_dev_threshold
@@ -87,13 +97,15 @@ class FraudDetectionService:
             }
         }
 
-    def analyze_transaction(self, customer_id: int, amount: float) -> Dict:
+    async def analyze_transaction(self, customer_id: int, amount: float) -> Dict:
         """
         Analyze a transaction for potential fraud using multiple detection methods.
         Returns combined analysis results.
         """
-        velocity_check = self.check_transaction_velocity(customer_id)
-        amount_check = self.check_amount_anomaly(customer_id, amount)
+        # One reference instant keeps every check in this analysis coherent
+        now = utcnow()
+        velocity_check = await self.check_transaction_velocity(customer_id, now)
+        amount_check = await self.check_amount_anomaly(customer_id, amount)
         
         is_suspicious = velocity_check["is_suspicious"] or amount_check["is_suspicious"]
         reasons = []
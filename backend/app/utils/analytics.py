@@ -1,27 +1,56 @@
-from datetime import datetime, timedelta, UTC
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import Dict, List
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, Row, Select, cast, desc, select, func
+from typing import Dict, List, Optional
 
 from app.models.transaction import Transaction
 from app.models.product import Product
 from app.models.customer import Customer
+from app.models.hourly_sales import hourly_sales
+from app.utils.dates import DAY, HOUR
+from app.core.cache import cached_result
+from app.core.config import settings
 
-def get_total_sales(db: Session, time_window: timedelta = None) -> float:
-    """Get total sales amount within the specified time window."""
-    query = db.query(func.sum(Transaction.price * Transaction.quantity))
+@cached_result(expire=settings.ANALYTICS_CACHE_TTL, namespace="dash")
+async def _latest_transaction_timestamp(db: AsyncSession) -> Optional[str]:
+    # ISO string so the value survives the JSON cache backend
+    latest = await db.scalar(select(func.max(Transaction.timestamp)))
+    return latest.isoformat() if latest else None
+
+async def get_latest_transaction_time(db: AsyncSession) -> Optional[datetime]:
+    """
+    Get the latest transaction timestamp, the reference point for the windowed metrics.
+    Cached briefly; new transactions clear it along with the rest of the "dash" namespace.
+    """
+    latest = await _latest_transaction_timestamp(db)
+    return datetime.fromisoformat(latest) if latest else None
+
+@cached_result(expire=settings.ANALYTICS_CACHE_TTL, namespace="dash")
+async def get_total_sales(
+    db: AsyncSession,
+    time_window: timedelta = None,
+    as_of: Optional[datetime] = None
+) -> float:
+    """
+    Get total sales amount within the specified time window.
+    `as_of` is the window's end; it defaults to the latest transaction timestamp.
+    """
+    query = select(func.sum(Transaction.price * Transaction.quantity))
     if time_window:
-        # Get latest transaction timestamp
-        latest_transaction = db.query(func.max(Transaction.timestamp)).scalar()
+        latest_transaction = as_of or await get_latest_transaction_time(db)
         if latest_transaction:
             cutoff = latest_transaction - time_window
-            query = query.filter(Transaction.timestamp >= cutoff)
-    return float(query.scalar() or 0.0)
+            query = query.where(Transaction.timestamp >= cutoff)
+    return float(await db.scalar(query) or 0.0)
 
-def get_sales_by_hour(db: Session, hours: int = 24) -> List[Dict]:
+async def get_sales_by_hour(
+    db: AsyncSession,
+    hours: int = 24,
+    as_of: Optional[datetime] = None
+) -> List[Dict]:
     """Get hourly sales data for the last n hours."""
     # First get the latest transaction timestamp
-    latest_transaction = db.query(func.max(Transaction.timestamp)).scalar()
+    latest_transaction = as_of or await get_latest_transaction_time(db)
     if not latest_transaction:
         return []
     
@@ -29,78 +58,57 @@ def get_sales_by_hour(db: Session, hours: int = 24) -> List[Dict]:
     end = latest_transaction.replace(minute=0, second=0, microsecond=0)
     cutoff = end - timedelta(hours=hours)
     
-    # Generate all hours in the range
-    all_hours = []
-    current = cutoff
+    # For longer time ranges, aggregate by day instead of hour to reduce points
+    if hours > 24 * 7:
+        unit, step, first_bucket = 'day', DAY, cutoff.replace(hour=0)
+    else:
+        unit, step, first_bucket = 'hour', HOUR, cutoff
     
-    while current <= end:
-        all_hours.append(current)
-        current += timedelta(hours=1)
-    
-    # Get actual sales data
-    hourly_sales = (
-        db.query(
-            func.date_trunc('hour', Transaction.timestamp).label('hour'),
-            func.sum(Transaction.price * Transaction.quantity).label('total_sales'),
-            func.count().label('num_transactions')
+    # Sales per bucket, rolled up from the pre-aggregated hourly materialized view
+    bucket = func.date_trunc(unit, hourly_sales.c.hour)
+    sales = (
+        select(
+            bucket.label('bucket'),
+            func.sum(hourly_sales.c.total_sales).label('total_sales'),
+            cast(func.sum(hourly_sales.c.num_transactions), Integer).label('num_transactions')
         )
-        .filter(Transaction.timestamp >= cutoff)
-        .group_by(func.date_trunc('hour', Transaction.timestamp))
-        .order_by(func.date_trunc('hour', Transaction.timestamp))
-        .all()
+        .where(hourly_sales.c.hour >= cutoff)
+        .group_by(bucket)
+        .subquery()
     )
     
-    # Convert to dictionary for easy lookup
-    sales_dict = {
-        hour: {'total_sales': float(total_sales or 0), 'num_transactions': num_transactions}
-        for hour, total_sales, num_transactions in hourly_sales
-    }
-    
-    # For longer time ranges, aggregate data to reduce points
-    if hours > 24 * 7:  # For ranges longer than a week
-        # Aggregate by day instead of hour
-        aggregated_hours = []
-        daily_data = {}
-        
-        for hour in all_hours:
-            day = hour.replace(hour=0)
-            if day not in daily_data:
-                daily_data[day] = {
-                    'total_sales': 0.0,
-                    'num_transactions': 0
-                }
-            
-            if hour in sales_dict:
-                daily_data[day]['total_sales'] += sales_dict[hour]['total_sales']
-                daily_data[day]['num_transactions'] += sales_dict[hour]['num_transactions']
-        
-        # Convert daily data to list
-        return [
-            {
-                'hour': day.isoformat(),
-                'total_sales': data['total_sales'],
-                'num_transactions': data['num_transactions']
-            }
-            for day, data in sorted(daily_data.items())
-        ]
+    # Every bucket in the range, so hours without sales still come back as zeros
+    buckets = func.generate_series(first_bucket, end, step).table_valued('bucket').render_derived()
+    rows = (
+        await db.execute(
+            select(
+                buckets.c.bucket,
+                func.coalesce(sales.c.total_sales, 0.0).label('total_sales'),
+                func.coalesce(sales.c.num_transactions, 0).label('num_transactions')
+            )
+            .select_from(buckets.outerjoin(sales, sales.c.bucket == buckets.c.bucket))
+            .order_by(buckets.c.bucket)
+        )
+    ).all()
     
-    # For shorter ranges, return hourly data
     return [
         {
-            'hour': hour.isoformat(),
-            'total_sales': sales_dict.get(hour, {'total_sales': 0.0})['total_sales'],
-            'num_transactions': sales_dict.get(hour, {'num_transactions': 0})['num_transactions']
+            'hour': hour,
+            'total_sales': total_sales,
+            'num_transactions': num_transactions
         }
-        for hour in all_hours
+        for hour, total_sales, num_transactions in rows
     ]
 
-def get_low_stock_products(db: Session, threshold: int = 10) -> List[Dict]:
+async def get_low_stock_products(db: AsyncSession, threshold: int = 10) -> List[Dict]:
     """Get products with stock quantity below threshold."""
+    # Only the four projected columns come back, as plain tuples
     products = (
-        db.query(Product)
-        .filter(Product.stock_quantity <= threshold)
-        .all()
-    )
+        await db.execute(
+            select(Product.id, Product.name, Product.stock_quantity, Product.category)
+            .where(Product.stock_quantity <= threshold)
+        )
+    ).all()
     return [
         {
             'id': p.id,
@@ -111,56 +119,98 @@ def get_low_stock_products(db: Session, threshold: int = 10) -> List[Dict]:
         for p in products
     ]
 
-def detect_suspicious_transactions(db: Session, time_window: timedelta = timedelta(hours=24)) -> List[Dict]:
-    """Detect suspicious transactions based on various criteria."""
-    # Get latest transaction timestamp
-    latest_transaction = db.query(func.max(Transaction.timestamp)).scalar()
+async def suspicious_transactions_query(
+    db: AsyncSession,
+    time_window: timedelta = DAY,
+    as_of: Optional[datetime] = None
+) -> Optional[Select]:
+    """Build the suspicious-transaction query, or return None when there are no transactions."""
+    latest_transaction = as_of or await get_latest_transaction_time(db)
     if not latest_transaction:
-        return []
+        return None
     
     cutoff = latest_transaction - time_window
     
-    # Get average transaction amount
-    avg_amount = db.query(func.avg(Transaction.price * Transaction.quantity)).scalar() or 0
-    
-    suspicious = (
-        db.query(Transaction)
-        .filter(
-            and_(
-                Transaction.timestamp >= cutoff,
-                Transaction.price * Transaction.quantity >= (avg_amount * 3)  # Transactions 3x above average
-            )
+    # Average amount over the same window, computed alongside the rows it filters
+    amount = Transaction.price * Transaction.quantity
+    windowed = (
+        select(
+            Transaction.id,
+            amount.label('amount'),
+            Transaction.timestamp,
+            Transaction.customer_id,
+            Transaction.status,
+            func.avg(amount).over().label('avg_amount')
         )
-        .all()
+        .where(Transaction.timestamp >= cutoff)
+        .subquery()
     )
     
-    return [
-        {
-            'id': t.id,
-            'amount': float(t.price * t.quantity),
-            'timestamp': t.timestamp.isoformat(),
-            'customer_id': t.customer_id,
-            'status': t.status
-        }
-        for t in suspicious
-    ]
+    # Plain column rows; the caller only serializes them, so skip ORM hydration
+    return select(
+        windowed.c.id,
+        windowed.c.amount,
+        windowed.c.timestamp,
+        windowed.c.customer_id,
+        windowed.c.status
+    ).where(
+        # Transactions 3x above the window's average
+        windowed.c.amount >= windowed.c.avg_amount * 3
+    )
+
+def serialize_suspicious_transaction(row: Row) -> Dict:
+    return {
+        'id': row.id,
+        'amount': float(row.amount),
+        'timestamp': row.timestamp.isoformat(),
+        'customer_id': row.customer_id,
+        'status': row.status
+    }
+
+async def detect_suspicious_transactions(
+    db: AsyncSession,
+    time_window: timedelta = DAY,
+    as_of: Optional[datetime] = None,
+    limit: Optional[int] = 100
+) -> List[Dict]:
+    """
+    Detect suspicious transactions based on various criteria.
+    Returns the `limit` largest by amount; pass limit=None for all of them.
+    """
+    query = await suspicious_transactions_query(db, time_window, as_of)
+    if query is None:
+        return []
+    
+    query = query.order_by(desc('amount'), 'id').limit(limit)
+    suspicious = (await db.execute(query)).all()
+    return [serialize_suspicious_transaction(row) for row in suspicious]
 
-def get_customer_metrics(db: Session) -> Dict:
+@cached_result(expire=settings.ANALYTICS_CACHE_TTL, namespace="dash")
+async def get_customer_metrics(db: AsyncSession) -> Dict:
     """Get various customer-related metrics."""
-    total_customers = db.query(func.count(Customer.id)).scalar()
-    avg_spent = db.query(func.avg(Customer.total_spent)).scalar() or 0
-    high_risk = db.query(func.count(Customer.id)).filter(Customer.risk_score >= 0.7).scalar()
+    metrics = (
+        await db.execute(
+            select(
+                func.count(Customer.id).label('total_customers'),
+                func.avg(Customer.total_spent).label('avg_spent'),
+                func.count(Customer.id).filter(Customer.risk_score >= 0.7).label('high_risk')
+            )
+        )
+    ).one()
     
     return {
-        'total_customers': total_customers,
-        'average_spent': float(avg_spent),
-        'high_risk_customers': high_risk
+        'total_customers': metrics.total_customers,
+        'average_spent': float(metrics.avg_spent or 0),
+        'high_risk_customers': metrics.high_risk
     }
 
-def get_transaction_metrics(db: Session, time_window: timedelta = timedelta(hours=24)) -> Dict:
+async def get_transaction_metrics(
+    db: AsyncSession,
+    time_window: timedelta = DAY,
+    as_of: Optional[datetime] = None
+) -> Dict:
     """Get various transaction-related metrics."""
-    # Get latest transaction timestamp
-    latest_transaction = db.query(func.max(Transaction.timestamp)).scalar()
+    latest_transaction = as_of or await get_latest_transaction_time(db)
     if not latest_transaction:
         return {
             'transaction_count': 0,
@@ -172,14 +222,15 @@ def get_transaction_metrics(db: Session, time_window: timedelta = timedelta(hour
     cutoff = latest_transaction - time_window
     
     metrics = (
-        db.query(
-            func.count().label('total_count'),
-            func.sum(Transaction.price * Transaction.quantity).label('total_amount'),
-            func.avg(Transaction.price * Transaction.quantity).label('avg_amount')
+        await db.execute(
+            select(
+                func.count().label('total_count'),
+                func.sum(Transaction.price * Transaction.quantity).label('total_amount'),
+                func.avg(Transaction.price * Transaction.quantity).label('avg_amount')
+            )
+            .where(Transaction.timestamp >= cutoff)
         )
-        .filter(Transaction.timestamp >= cutoff)
-        .first()
-    )
+    ).first()
     
     return {
         'transaction_count': metrics.total_count,
@@ -1,15 +1,99 @@
+import csv
+import enum
+import io
+from functools import lru_cache
 import pandas as pd
+from pyarrow import csv as pacsv
 from sqlalchemy.orm import Session
-from typing import Type, Dict, Any
+from typing import Type, Dict, Any, List
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy import text
+from sqlalchemy import text, Integer
+
+@lru_cache(maxsize=16)
+def _model_columns(model: Type[DeclarativeMeta]) -> frozenset:
+    """Column names of a model's table, computed once per model."""
+    return frozenset(c.name for c in model.__table__.columns)
+
+@lru_cache(maxsize=16)
+def _integer_columns(model: Type[DeclarativeMeta]) -> frozenset:
+    """Names of a model's integer columns, computed once per model."""
+    return frozenset(c.name for c in model.__table__.columns if isinstance(c.type, Integer))
+
+def _column_defaults(model: Type[DeclarativeMeta]) -> Dict[str, Any]:
+    """
+    Python-side column defaults of a model, resolved to plain values.
+    
+    Callable defaults (e.g. utcnow) are evaluated once per call, matching what
+    the ORM would have stored for rows inserted at the same moment.
+    """
+    defaults = {}
+    for column in model.__table__.columns:
+        default = column.default
+        if default is None or default.is_sequence or default.is_clause_element:
+            continue
+        value = default.arg(None) if default.is_callable else default.arg
+        defaults[column.name] = value.value if isinstance(value, enum.Enum) else value
+    return defaults
+
+def _integral_floats(row: tuple, positions: List[int]) -> list:
+    """Replace whole-number floats at the given positions of a row with ints."""
+    row = list(row)
+    for i in positions:
+        value = row[i]
+        if value is not None and value.is_integer():
+            row[i] = int(value)
+    return row
+
+def psql_copy(table, conn, keys, data_iter) -> int:
+    """
+    pandas.to_sql insertion method that loads rows with PostgreSQL COPY FROM STDIN.
+    
+    Rows bypass the ORM entirely, so model-level defaults and events do not run;
+    missing values are written as NULL. import_csv_to_db fills model defaults in
+    before calling to_sql.
+    
+    Whole numbers in float columns are written without a fractional part: pandas
+    widens integer columns with blanks to float, and COPY rejects "5.0" for an
+    integer column while float columns accept "5".
+    
+    Args:
+        table: pandas SQLTable being written
+        conn: SQLAlchemy connection (psycopg2 driver)
+        keys: column names, in row order
+        data_iter: iterable of row tuples
+    
+    Returns:
+        int: number of rows copied
+    """
+    float_positions = [
+        i for i, k in enumerate(keys)
+        if k in table.frame.columns and pd.api.types.is_float_dtype(table.frame[k])
+    ]
+    if float_positions:
+        data_iter = (_integral_floats(row, float_positions) for row in data_iter)
+    
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(data_iter)
+    buf.seek(0)
+    
+    preparer = conn.dialect.identifier_preparer
+    table_name = preparer.quote(table.name)
+    if table.schema:
+        table_name = f"{preparer.quote_schema(table.schema)}.{table_name}"
+    columns = ", ".join(preparer.quote(k) for k in keys)
+    
+    # Run on the caller's connection so the COPY joins its transaction
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", buf)
+        return cursor.rowcount
 
 def import_csv_to_db(
     db: Session,
     csv_file: str,
     model: Type[DeclarativeMeta],
     mapping: Dict[str, str] = None,
-    chunk_size: int = 1000
+    block_size: int = 8 << 20
 ) -> tuple[int, int]:
     """
     Import data from a CSV file into the database.
@@ -19,7 +103,7 @@ def import_csv_to_db(
         csv_file: Path to the CSV file
         model: SQLAlchemy model class
         mapping: Dictionary mapping CSV columns to model attributes
-        chunk_size: Number of records to process at once
+        block_size: Bytes of CSV parsed per batch
     
     Returns:
         tuple: (number of records processed, number of records imported)
@@ -30,45 +114,94 @@ def import_csv_to_db(
         # First disable foreign key checks
         db.execute(text("SET CONSTRAINTS ALL DEFERRED"))
         db.query(model).delete()
-        db.commit()
         
-        # Read CSV in chunks to handle large files
-        chunks = pd.read_csv(csv_file, chunksize=chunk_size)
+        # Stream the CSV in record batches with Arrow's multi-threaded parser
+        reader = pacsv.open_csv(csv_file, read_options=pacsv.ReadOptions(block_size=block_size))
         total_processed = 0
         total_imported = 0
+        model_columns = _model_columns(model)
         
-        for chunk in chunks:
+        for batch in reader:
             # Rename columns if mapping is provided
             if mapping:
-                chunk = chunk.rename(columns=mapping)
+                batch = batch.rename_columns([mapping.get(c, c) for c in batch.schema.names])
+            total_processed += batch.num_rows
             
-            # Convert DataFrame to list of dictionaries
-            records = chunk.to_dict('records')
-            total_processed += len(records)
+            # Remove any columns that don't exist in the model before converting to pandas
+            batch = batch.select([c for c in batch.schema.names if c in model_columns])
             
-            # Create model instances
-            instances = []
-            for record in records:
-                # Remove any columns that don't exist in the model
-                valid_data = {
-                    k: v for k, v in record.items() 
-                    if hasattr(model, k) and v is not None and pd.notna(v)
-                }
-                if valid_data:
-                    instances.append(model(**valid_data))
+            # Skip rows with no data left
+            chunk = batch.to_pandas().dropna(how='all')
             
-            if instances:
-                # Bulk insert the instances
-                db.bulk_save_objects(instances)
-                db.commit()
-                total_imported += len(instances)
-                
+            # COPY skips model defaults, so fill blanks with them as the ORM would,
+            # and keep integer columns with blanks from being written as floats
+            defaults = _column_defaults(model)
+            chunk = chunk.fillna({c: v for c, v in defaults.items() if c in chunk.columns})
+            int_columns = [c for c in chunk.columns if c in _integer_columns(model)]
+            if int_columns:
+                chunk = chunk.astype({c: 'Int64' for c in int_columns})
+            
+            # Stream the chunk straight into the table
+            if not chunk.empty:
+                chunk.to_sql(
+                    model.__tablename__,
+                    db.connection(),
+                    if_exists='append',
+                    index=False,
+                    method=psql_copy
+                )
+                total_imported += len(chunk)
+        
+        # One commit for the clear and the whole load: a single WAL flush, and a
+        # failed import leaves the previous data in place
+        db.commit()
         return total_processed, total_imported
             
     except Exception as e:
         db.rollback()
         raise Exception(f"Error importing data: {str(e)}")
 
+def drop_indexes(db: Session, table_name: str) -> List[str]:
+    """
+    Drop a table's secondary indexes ahead of a bulk load.
+    
+    Indexes that back a constraint (primary key, unique) are kept. Run the
+    returned definitions with recreate_indexes() once the load is done.
+    
+    Args:
+        db: SQLAlchemy database session
+        table_name: Table whose indexes are dropped
+    
+    Returns:
+        list: CREATE INDEX statements for the dropped indexes
+    """
+    indexes = db.execute(
+        text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = :table_name "
+            "AND indexname NOT IN ("
+            "    SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table_name AS regclass)"
+            ")"
+        ),
+        {"table_name": table_name}
+    ).all()
+    
+    preparer = db.get_bind().dialect.identifier_preparer
+    for name, _ in indexes:
+        db.execute(text(f"DROP INDEX IF EXISTS {preparer.quote(name)}"))
+    return [definition for _, definition in indexes]
+
+def recreate_indexes(db: Session, definitions: List[str]) -> None:
+    """
+    Rebuild indexes dropped by drop_indexes().
+    
+    Args:
+        db: SQLAlchemy database session
+        definitions: CREATE INDEX statements returned by drop_indexes()
+    """
+    for definition in definitions:
+        db.execute(text(definition))
+
 def validate_csv_headers(csv_file: str, expected_headers: list[str]) -> tuple[bool, list[str]]:
     """
     Validate if CSV file has the required headers.
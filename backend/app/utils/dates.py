@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta, UTC
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+def utcnow() -> datetime:
+    """
+    Current UTC time as a naive datetime.
+
+    The DateTime columns are timezone-naive and store UTC, so the tzinfo is
+    dropped to keep comparisons and asyncpg parameter binding consistent.
+    """
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def start_of_day(value: datetime) -> datetime:
+    """Truncate a datetime to midnight, matching date_trunc('day', ...)."""
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -1,22 +1,38 @@
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, engine
 from app.models.product import Product
 from app.models.customer import Customer
 from app.models.transaction import Transaction, TransactionStatus, PaymentMethod
+from app.models.events import recalculate_all_customer_totals
 from app.models.supplier import Supplier
-from app.utils.data_import import import_csv_to_db, validate_csv_headers
+from app.utils.data_import import (
+    import_csv_to_db,
+    validate_csv_headers,
+    drop_indexes,
+    recreate_indexes
+)
+from scripts.refresh_analytics_views import refresh_analytics_views
 import os
 import sys
-from sqlalchemy import text
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+from sqlalchemy import insert, text
 import pandas as pd
 
+IMPORTED_TABLES = ("transaction", "product", "customer", "supplier")
+
 def clear_all_tables(db):
-    """Clear all tables in the correct order to handle foreign key constraints."""
+    """Clear all imported tables in one statement, resetting their id sequences."""
     print("\nClearing existing data from all tables...")
-    db.execute(text("SET CONSTRAINTS ALL DEFERRED"))
-    db.execute(text("TRUNCATE TABLE transaction CASCADE"))
-    db.execute(text("TRUNCATE TABLE product CASCADE"))
-    db.execute(text("TRUNCATE TABLE customer CASCADE"))
-    db.execute(text("TRUNCATE TABLE supplier CASCADE"))
+    db.execute(text(f"TRUNCATE TABLE {', '.join(IMPORTED_TABLES)} RESTART IDENTITY CASCADE"))
+    db.commit()
+
+def sync_id_sequences(db):
+    """Move each id sequence past the ids loaded from the CSVs so new rows don't collide."""
+    for table in IMPORTED_TABLES:
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"coalesce(max(id), 1), max(id) IS NOT NULL) FROM {table}"
+        ))
     db.commit()
 
 def import_products(csv_file: str):
@@ -48,28 +64,24 @@ def import_customers(csv_file: str):
         processed, imported = import_csv_to_db(db, csv_file, Customer)
         print(f"Processed {processed} records, imported {imported} customers")
 
-def transform_payment_method(payment_method: str) -> str:
-    """Transform payment method to match enum values."""
-    mapping = {
-        'apple_pay': 'credit_card',  # Map Apple Pay to credit card
-        'google_pay': 'credit_card',  # Map Google Pay to credit card
-        'paypal': 'paypal',
-        'credit_card': 'credit_card',
-        'bank_transfer': 'bank_transfer'
-    }
-    return mapping.get(payment_method.lower(), 'credit_card')
+# CSV payment methods -> enum values; anything unknown falls back to credit_card
+PAYMENT_METHOD_MAP = {
+    'apple_pay': 'credit_card',  # Map Apple Pay to credit card
+    'google_pay': 'credit_card',  # Map Google Pay to credit card
+    'paypal': 'paypal',
+    'credit_card': 'credit_card',
+    'bank_transfer': 'bank_transfer'
+}
 
-def transform_status(status: str) -> str:
-    """Transform status to match enum values."""
-    mapping = {
-        'pending': 'pending',
-        'completed': 'completed',
-        'failed': 'failed',
-        'suspicious': 'suspicious',
-        'flagged': 'suspicious',
-        'refunded': 'failed'
-    }
-    return mapping.get(status.lower(), 'pending')
+# CSV statuses -> enum values; anything unknown falls back to pending
+STATUS_MAP = {
+    'pending': 'pending',
+    'completed': 'completed',
+    'failed': 'failed',
+    'suspicious': 'suspicious',
+    'flagged': 'suspicious',
+    'refunded': 'failed'
+}
 
 def import_transactions(csv_file: str):
     """Import transactions from CSV file."""
@@ -86,29 +98,50 @@ def import_transactions(csv_file: str):
     # Convert timestamp to datetime with mixed format support
     df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed')
     
-    # Transform status and payment_method
-    df['status'] = df['status'].apply(transform_status)
-    df['payment_method'] = df['payment_method'].apply(transform_payment_method)
+    # Transform status and payment_method column-wise
+    df['status'] = df['status'].str.lower().map(STATUS_MAP).fillna('pending')
+    df['payment_method'] = df['payment_method'].str.lower().map(PAYMENT_METHOD_MAP).fillna('credit_card')
     
     # Keep only the columns we need and rename them
     df = df.rename(columns={'unit_price': 'price'})
     needed_columns = ['id', 'customer_id', 'product_id', 'quantity', 'price', 'status', 'payment_method', 'timestamp']
     df = df[needed_columns]
     
+    # Convert NaN/NaT to None for the whole frame at once rather than per row
+    df = df.astype(object).where(df.notna(), None)
+    
     print(f"Importing {len(df)} transactions...")
     print(f"Sample transaction: {df.iloc[0].to_dict()}")
     
     # Import to database
     with SessionLocal() as db:
         try:
+            # The load is all-or-nothing and rerunnable, so skip waiting on the WAL flush
+            # and keep the table unlogged while it fills; nothing references it by FK
+            db.execute(text("SET LOCAL synchronous_commit = off"))
+            db.execute(text("ALTER TABLE transaction SET UNLOGGED"))
+            
+            # Building each index once after the load is far cheaper than
+            # maintaining every one of them row by row
+            index_definitions = drop_indexes(db, Transaction.__tablename__)
+            
             batch_size = 1000
             for i in range(0, len(df), batch_size):
                 batch = df.iloc[i:i+batch_size]
-                for _, row in batch.iterrows():
-                    transaction = Transaction(**row.to_dict())
-                    db.add(transaction)
-                db.commit()
+                # Core executemany insert; no ORM instances are built per row
+                db.execute(insert(Transaction), batch.to_dict('records'))
                 print(f"Imported {i+len(batch)} transactions...")
+            
+            print(f"Rebuilding {len(index_definitions)} transaction indexes...")
+            recreate_indexes(db, index_definitions)
+            
+            # Writes the loaded table to the WAL once, instead of row by row
+            db.execute(text("ALTER TABLE transaction SET LOGGED"))
+            
+            # Core inserts skip the ORM listeners that maintain total_spent;
+            # customers with no completed transactions keep their CSV total.
+            # This also commits the whole import in a single transaction
+            recalculate_all_customer_totals(db, only_with_completed=True)
             print(f"Successfully imported all {len(df)} transactions")
         except Exception as e:
             db.rollback()
@@ -128,6 +161,19 @@ def import_suppliers(csv_file: str):
         processed, imported = import_csv_to_db(db, csv_file, Supplier)
         print(f"Processed {processed} records, imported {imported} suppliers")
 
+def _init_import_worker():
+    """Drop pooled connections inherited from the parent; each worker opens its own."""
+    engine.dispose(close=False)
+
+def submit_import(executor: ProcessPoolExecutor, importer, data_dir: str, name: str) -> Optional[Future]:
+    """Schedule importer for data_dir/<name>.csv, or return None if the file is missing."""
+    csv_file = os.path.join(data_dir, f'{name}.csv')
+    if not os.path.exists(csv_file):
+        print(f"\nSkipping {name} import - {name}.csv not found")
+        return None
+    print(f"\nImporting {name}...")
+    return executor.submit(importer, csv_file)
+
 def create_data_directory(data_dir: str):
     """Create data directory if it doesn't exist."""
     try:
@@ -182,36 +228,27 @@ if __name__ == "__main__":
     with SessionLocal() as db:
         clear_all_tables(db)
     
-    # Import suppliers first (no dependencies)
-    suppliers_file = os.path.join(data_dir, 'suppliers.csv')
-    if os.path.exists(suppliers_file):
-        print("\nImporting suppliers...")
-        import_suppliers(suppliers_file)
-    else:
-        print("\nSkipping suppliers import - suppliers.csv not found")
-    
-    # Import products (depends on suppliers)
-    products_file = os.path.join(data_dir, 'products.csv')
-    if os.path.exists(products_file):
-        print("\nImporting products...")
-        import_products(products_file)
-    else:
-        print("\nSkipping products import - products.csv not found")
-    
-    # Import customers (no dependencies)
-    customers_file = os.path.join(data_dir, 'customers.csv')
-    if os.path.exists(customers_file):
-        print("\nImporting customers...")
-        import_customers(customers_file)
-    else:
-        print("\nSkipping customers import - customers.csv not found")
-    
-    # Import transactions last (depends on products and customers)
-    transactions_file = os.path.join(data_dir, 'transactions.csv')
-    if os.path.exists(transactions_file):
-        print("\nImporting transactions...")
-        import_transactions(transactions_file)
-    else:
-        print("\nSkipping transactions import - transactions.csv not found")
+    # Suppliers and customers are independent, so load them in parallel; products
+    # only wait for suppliers and transactions wait for both products and customers
+    with ProcessPoolExecutor(max_workers=2, initializer=_init_import_worker) as executor:
+        suppliers = submit_import(executor, import_suppliers, data_dir, 'suppliers')
+        customers = submit_import(executor, import_customers, data_dir, 'customers')
+        
+        if suppliers:
+            suppliers.result()
+        products = submit_import(executor, import_products, data_dir, 'products')
+        
+        for future in (products, customers):
+            if future:
+                future.result()
+        transactions = submit_import(executor, import_transactions, data_dir, 'transactions')
+        if transactions:
+            transactions.result()
+    
+    with SessionLocal() as db:
+        sync_id_sequences(db)
+    
+    print("\nRefreshing analytics views...")
+    refresh_analytics_views()
     
     print("\nData import process completed!") 
\ No newline at end of file
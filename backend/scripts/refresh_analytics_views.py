@@ -0,0 +1,19 @@
+from app.db.session import engine
+from app.models.daily_sales import refresh_daily_sales
+from app.models.hourly_sales import refresh_hourly_sales
+from app.models.customer_stats import refresh_customer_stats
+
+
+def refresh_analytics_views() -> None:
+    """Refresh the materialized views backing the analytics endpoints."""
+    with engine.begin() as connection:
+        refresh_daily_sales(connection)
+        refresh_hourly_sales(connection)
+        refresh_customer_stats(connection)
+
+
+if __name__ == "__main__":
+    # Meant to be scheduled (e.g. every 5 minutes from cron)
+    print("Refreshing analytics materialized views...")
+    refresh_analytics_views()
+    print("Analytics materialized views refreshed!")